@@ -0,0 +1,430 @@
+"""
+Offline benchmark for dodger-bot.
+
+Replays MLB Stats API responses recorded under FIXTURE_DIR and times the bot's
+main pipelines end to end, reporting p50/p95 latency and API requests per run.
+
+Record fixtures once (needs network access):
+    python benchmark.py --record
+
+Then benchmark offline, optionally injecting latency and errors:
+    python benchmark.py --runs 20 --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+
+Time the batting stats for 10, 30 and a season of games, fetching boxscores one
+at a time and concurrently (pass --record with --games to capture that many games).
+Beyond a few dozen games the API rate limit, not latency, bounds the concurrent runs:
+    python benchmark.py --games 10,30,162 --latency-ms 150
+
+Time cold starts (module import and time to on_ready) in fresh interpreters,
+failing when the median exceeds a target so CI can check it:
+    python benchmark.py --startup --max-ready-ms 1500
+
+Measure event loop lag while a 162-game aggregation runs, for each worker pool:
+    python benchmark.py --loop-lag --max-lag-ms 15
+
+Compare bytes, parse time and peak memory per game of the full live feed and
+the `fields=` filtered boxscore (pass --record with --payloads to capture both):
+    python benchmark.py --payloads
+
+Compare the memory a season of games and batting lines holds as JSON dicts and
+as the bot's slotted records:
+    python benchmark.py --memory
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import gc
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--record", action="store_true", help="call the live API once and save its responses as fixtures")
+parser.add_argument("--runs", type=int, default=10, help="timed runs per scenario")
+parser.add_argument("--latency-ms", type=float, default=0.0, help="injected latency per replayed request")
+parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra random latency per replayed request")
+parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of replayed requests that fail with a 503")
+parser.add_argument("--warm", action="store_true", help="keep caches between runs instead of starting cold")
+parser.add_argument("--games", help="comma-separated game counts, e.g. 10,30,162, to time batting stats for")
+parser.add_argument("--payloads", action="store_true", help="compare the live feed and the filtered boxscore per game")
+parser.add_argument("--startup", action="store_true", help="time cold starts instead of the pipelines")
+parser.add_argument("--max-import-ms", type=float, help="with --startup, fail if the median import time exceeds this")
+parser.add_argument("--max-ready-ms", type=float, help="with --startup, fail if the median time to ready exceeds this")
+parser.add_argument("--loop-lag", action="store_true", help="measure event loop lag during a 162-game aggregation")
+parser.add_argument("--max-lag-ms", type=float, help="with --loop-lag, fail if the configured WORKER_POOL lags more than this")
+parser.add_argument("--memory", action="store_true", help="compare the memory held by a season as JSON dicts and as records")
+args = parser.parse_args()
+
+# bot.py reads its configuration at import time.
+cache_dir = tempfile.mkdtemp(prefix="dodger-bot-bench-")
+os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+os.environ.setdefault("CHANNEL_ID", "0")
+os.environ.pop("ADMIN_CHANNEL_ID", None)
+os.environ["BOXSCORE_CACHE_PATH"] = os.path.join(cache_dir, "boxscores.sqlite3")
+os.environ["HISTORY_DB_PATH"] = os.path.join(cache_dir, "history.sqlite3")
+os.environ["JOB_STORE_PATH"] = os.path.join(cache_dir, "jobs.sqlite3")
+os.environ["HTTP_TRANSPORT"] = "record" if args.record else "replay"
+os.environ["REPLAY_LATENCY_MS"] = str(args.latency_ms)
+os.environ["REPLAY_JITTER_MS"] = str(args.jitter_ms)
+os.environ["REPLAY_ERROR_RATE"] = str(args.error_rate)
+
+# Run in a fresh interpreter per sample: import bot, then go through setup_hook and
+# on_ready as discord.py would after login. The warm-up that on_ready starts in the
+# background is awaited separately, since commands are already answered meanwhile.
+STARTUP_PROBE = """
+import asyncio, contextlib, io, sys, time, types
+start = time.perf_counter()
+import bot
+imported = time.perf_counter()
+
+async def main():
+    bot.bot._connection.user = types.SimpleNamespace(name="benchmark", id=0)
+    await bot.bot.setup_hook()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await bot.on_ready()
+        ready = time.perf_counter()
+        await bot.startup_task
+    warmed = time.perf_counter()
+    print((imported - start) * 1000, (ready - start) * 1000, (warmed - ready) * 1000)
+
+asyncio.run(main())
+"""
+
+
+def startup_benchmark():
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=dict(os.environ, HISTORY_BACKFILL="0"),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append([float(value) for value in output.split()[-3:]])
+    import_ms, ready_ms, warm_ms = (statistics.median(column) for column in zip(*samples))
+    print(f"{'Phase':28s} {'p50 ms':>9s}")
+    print(f"{'import':28s} {import_ms:9.1f}")
+    print(f"{'ready':28s} {ready_ms:9.1f}")
+    print(f"{'cache warm-up (background)':28s} {warm_ms:9.1f}")
+    failed = False
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"import took {import_ms:.1f} ms, over the {args.max_import_ms:.0f} ms target")
+        failed = True
+    if args.max_ready_ms is not None and ready_ms > args.max_ready_ms:
+        print(f"ready took {ready_ms:.1f} ms, over the {args.max_ready_ms:.0f} ms target")
+        failed = True
+    return 1 if failed else 0
+
+
+if args.startup:
+    sys.exit(startup_benchmark())
+
+import bot  # noqa: E402
+
+
+class NullChannel:
+    id = 0
+
+    async def send(self, content=None, file=None):
+        pass
+
+
+def reset_caches():
+    bot.schedule_index = None
+    bot.standings_records = None
+    bot.batting_windows.clear()
+    bot.result_cache.entries.clear()
+    bot.channel_send_buckets.clear()
+    # Start each run with a full rate limit bucket, so scenarios don't slow each other down.
+    bot.rate_limiter.tokens = bot.rate_limiter.capacity
+    with bot.get_boxscore_cache() as db:
+        db.execute("DELETE FROM boxscores")
+
+
+def replay_misses():
+    return getattr(bot.transport, "missing_count", 0)
+
+
+async def time_scenario(name, factory, runs):
+    """
+    Times `runs` calls of factory() and prints p50/p95 latency and requests per
+    run. A run that raises, returns the bot's error text, or asks for a response
+    that was never recorded counts as failed and is left out of the timings.
+    Returns the number of failed runs.
+    """
+    latencies = []
+    requests = []
+    failed = 0
+    for _ in range(runs):
+        if not args.warm:
+            reset_caches()
+        before = bot.transport.request_count
+        misses = replay_misses()
+        start = time.perf_counter()
+        # The bot logs through print(); keep the report readable.
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                result = await factory()
+            except Exception as e:
+                result = e
+        elapsed = (time.perf_counter() - start) * 1000
+        error_text = isinstance(result, str) and result.startswith("An error occurred")
+        if isinstance(result, Exception) or error_text or replay_misses() > misses:
+            failed += 1
+            continue
+        latencies.append(elapsed)
+        requests.append(bot.transport.request_count - before)
+    if not latencies:
+        print(f"{name:28s} {'-':>9s} {'-':>9s} {'-':>9s} {failed:7d}")
+        return failed
+    p50 = statistics.median(latencies)
+    p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else latencies[0]
+    print(f"{name:28s} {p50:9.1f} {p95:9.1f} {statistics.mean(requests):9.1f} {failed:7d}")
+    return failed
+
+
+def synthetic_season(games=162, players=26):
+    """
+    A season schedule response and one boxscore per game, shaped like the API's,
+    with random batting lines for both teams.
+    """
+    rnd = random.Random(162)
+    schedule = {"dates": []}
+    boxscores = []
+    for game_pk in range(games):
+        day = datetime.date(2024, 3, 28) + datetime.timedelta(days=game_pk)
+        schedule["dates"].append({"date": str(day), "games": [{
+            "gamePk": game_pk, "link": f"/api/v1.1/game/{game_pk}/feed/live", "gameType": "R",
+            "season": "2024", "gameDate": f"{day}T02:10:00Z", "officialDate": str(day),
+            "status": {"abstractGameState": "Final", "codedGameState": "F", "detailedState": "Final",
+                       "statusCode": "F", "startTimeTBD": False, "abstractGameCode": "F"},
+            "teams": {side: {"leagueRecord": {"wins": game_pk // 2, "losses": game_pk // 2, "pct": ".500"},
+                             "score": rnd.randint(0, 9),
+                             "team": {"id": team_id, "name": f"Team {team_id}", "link": f"/api/v1/teams/{team_id}"},
+                             "isWinner": side == "home", "splitSquad": False, "seriesNumber": game_pk // 3 + 1}
+                      for side, team_id in (("home", bot.TEAM_ID), ("away", 137))},
+            "venue": {"id": 22, "name": "Dodger Stadium", "link": "/api/v1/venues/22"},
+            "content": {"link": f"/api/v1/game/{game_pk}/content"}, "isTie": False, "gameNumber": 1,
+            "publicFacing": True, "doubleHeader": "N", "gamedayType": "P", "tiebreaker": "N",
+            "calendarEventID": f"14-{game_pk}-{day}", "seasonDisplay": "2024", "dayNight": "night",
+            "scheduledInnings": 9, "reverseHomeAwayStatus": False, "inningBreakLength": 120,
+            "gamesInSeries": 3, "seriesGameNumber": game_pk % 3 + 1, "seriesDescription": "Regular Season",
+            "recordSource": "S", "ifNecessary": "N", "ifNecessaryDescription": "Normal Game",
+        }]})
+        teams = {}
+        for side, team_id in (("home", bot.TEAM_ID), ("away", 137)):
+            roster = {}
+            for i in range(players):
+                batting = {field: rnd.randint(0, 4) for field in bot.BATTING_FIELDS}
+                roster[f"ID{team_id * 100 + i}"] = {
+                    "person": {"id": team_id * 100 + i, "fullName": f"Player {team_id * 100 + i}"},
+                    "stats": {"batting": batting},
+                }
+            teams[side] = {"team": {"id": team_id}, "players": roster}
+        boxscores.append({"teams": teams})
+    return json.dumps(schedule).encode(), boxscores
+
+
+async def loop_lag_benchmark():
+    schedule_body, boxscores = synthetic_season()
+    url = f"{bot.BASE_URL}/v1/schedule"
+    configured_pool = bot.WORKER_POOL
+    failed = False
+    print(f"{'Worker pool':28s} {'run ms':>9s} {'max lag':>9s} {'p99 lag':>9s}")
+    for pool in ("inline", "thread", "process"):
+        bot.shutdown_worker_executor()
+        bot.WORKER_POOL = pool
+        await bot.run_in_worker(len, "")  # start the workers outside the timed run
+        lags = []
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+        probe_task = asyncio.create_task(probe())
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        await bot.decode_json(url, schedule_body)
+        stats = await bot.run_in_worker(bot.merge_batting_lines, boxscores, bot.TEAM_ID)
+        await bot.run_in_worker(bot.compute_batting_average, stats)
+        elapsed = (time.perf_counter() - start) * 1000
+        done.set()
+        await probe_task
+        p99 = statistics.quantiles(lags, n=100)[98] if len(lags) > 1 else lags[0]
+        print(f"{pool:28s} {elapsed:9.1f} {max(lags):9.1f} {p99:9.1f}")
+        if pool == configured_pool and args.max_lag_ms is not None and max(lags) > args.max_lag_ms:
+            failed = True
+    bot.shutdown_worker_executor()
+    bot.WORKER_POOL = configured_pool
+    if failed:
+        print(f"{configured_pool} pool lagged over the {args.max_lag_ms:.0f} ms target")
+    return 1 if failed else 0
+
+
+def retained_bytes(build):
+    """
+    Memory still allocated by build()'s result once it returns, so temporaries
+    such as a decoded response that was parsed and dropped are not counted.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def dict_batting_lines(boxscore, team_id):
+    # The per-player dicts the bot used to build from a boxscore.
+    for team_box in boxscore["teams"].values():
+        if team_box["team"]["id"] == team_id:
+            return {
+                info["person"]["id"]: dict(
+                    {"name": info["person"]["fullName"]},
+                    **{field: int(info["stats"]["batting"].get(field, 0)) for field in bot.BATTING_FIELDS},
+                )
+                for info in team_box["players"].values()
+            }
+
+
+def memory_benchmark():
+    schedule_body, boxscores = synthetic_season()
+    boxscores = json.loads(json.dumps(boxscores))  # as decoded from API responses
+    scenarios = [
+        ("162-game schedule",
+         lambda: json.loads(schedule_body)["dates"],
+         lambda: bot.parse_schedule_games(json.loads(schedule_body))),
+        ("162 games of batting lines",
+         lambda: [dict_batting_lines(boxscore, bot.TEAM_ID) for boxscore in boxscores],
+         lambda: bot.extract_batting_lines(boxscores, bot.TEAM_ID)),
+    ]
+    print(f"{'Data':28s} {'dicts KB':>9s} {'records KB':>11s} {'ratio':>6s}")
+    for name, as_dicts, as_records in scenarios:
+        dict_bytes = retained_bytes(as_dicts)
+        record_bytes = retained_bytes(as_records)
+        print(f"{name:28s} {dict_bytes / 1024:9.1f} {record_bytes / 1024:11.1f} {record_bytes / dict_bytes:6.1%}")
+
+
+async def games_benchmark(runs):
+    print(f"{'Scenario':28s} {'p50 ms':>9s} {'p95 ms':>9s} {'requests':>9s} {'failed':>7s}")
+    failed = 0
+    for max_games in (int(count) for count in args.games.split(",")):
+        days_delta = max(bot.SCHEDULE_PAST_DAYS, max_games * 2)
+        for label, concurrency in (("sequential", 1), ("concurrent", bot.BOXSCORE_CONCURRENCY)):
+            async def aggregate(max_games=max_games, days_delta=days_delta, concurrency=concurrency):
+                games = await bot.get_recent_games(bot.TEAM_ID, days_delta=days_delta, max_games=max_games)
+                await bot.aggregate_player_stats(games, bot.TEAM_ID, concurrency=concurrency)
+            failed += await time_scenario(f"{max_games} games, {label}", aggregate, runs)
+    return failed
+
+
+async def payload_benchmark():
+    """
+    Reports, per game, the response size, the time to decode it and extract the
+    batting lines, and the peak memory allocated while doing so.
+    """
+    games = await bot.get_recent_games(bot.TEAM_ID, max_games=10)
+    payloads = [
+        ("feed/live", lambda game_pk: (f"{bot.BASE_URL}/v1.1/game/{game_pk}/feed/live", None),
+         lambda data: data["liveData"]["boxscore"]),
+        ("boxscore?fields=", lambda game_pk: (f"{bot.BASE_URL}/v1/game/{game_pk}/boxscore", {"fields": bot.BOXSCORE_FIELDS}),
+         lambda data: data),
+    ]
+    print(f"{'Payload':28s} {'games':>6s} {'KB/game':>9s} {'parse ms':>9s} {'peak KB':>9s}")
+    failed = 0
+    for name, request, boxscore_of in payloads:
+        sizes, parse_ms, peaks = [], [], []
+        for game in games:
+            url, params = request(game.game_pk)
+            status, _, body = await bot.transport.get(url, params=params)
+            if status != 200:
+                failed += 1
+                continue
+            start = time.perf_counter()
+            bot.team_batting_lines(boxscore_of(json.loads(body)), bot.TEAM_ID)
+            parse_ms.append((time.perf_counter() - start) * 1000)
+            gc.collect()
+            tracemalloc.start()
+            bot.team_batting_lines(boxscore_of(json.loads(body)), bot.TEAM_ID)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            sizes.append(len(body))
+        if not sizes:
+            print(f"{name:28s} {0:6d}   no recorded responses")
+            continue
+        print(
+            f"{name:28s} {len(sizes):6d} {statistics.mean(sizes) / 1024:9.1f} "
+            f"{statistics.mean(parse_ms):9.2f} {statistics.mean(peaks) / 1024:9.1f}"
+        )
+    return failed
+
+
+async def post_daily_update():
+    # Forget the previous run's updates so every run builds and sends them again.
+    job = bot.SCHEDULED_JOBS[0]
+    with bot.get_job_store() as db:
+        db.execute("DELETE FROM job_runs")
+        db.execute("DELETE FROM job_state WHERE key = ?", (bot.last_run_key(job),))
+    job.retries.clear()
+    now = datetime.datetime.now(bot.PACIFIC_TZ)
+    await bot.post_job(job, now)
+    # post_job logs failures instead of raising; a complete run is recorded.
+    if bot.load_job_state(bot.last_run_key(job)) != now.date().isoformat():
+        raise Exception("daily update was not posted to every channel")
+
+
+async def main_scenarios(runs):
+    # The chat command wrappers turn errors into message text, so time the
+    # variants that raise them.
+    print(f"{'Scenario':28s} {'p50 ms':>9s} {'p95 ms':>9s} {'requests':>9s} {'failed':>7s}")
+    failed = await time_scenario(
+        "get_dodgers_batting_stats", lambda: bot.cached_team_batting_stats(bot.TEAM_ID), runs
+    )
+    failed += await time_scenario(
+        "get_nlwest_standings", lambda: bot.cached_division_standings(bot.NL_WEST_DIVISION_ID), runs
+    )
+    failed += await time_scenario("daily_update", post_daily_update, runs)
+    return failed
+
+
+async def main():
+    if args.memory:
+        memory_benchmark()
+        return
+    if args.loop_lag:
+        return await loop_lag_benchmark()
+    if not args.record and not (os.path.isdir(bot.FIXTURE_DIR) and os.listdir(bot.FIXTURE_DIR)):
+        print(f"No fixtures in {bot.FIXTURE_DIR}/; record them first with --record")
+        return 1
+    bot.bot.get_channel = lambda channel_id: NullChannel()
+    runs = 1 if args.record else args.runs
+    if args.payloads:
+        failed = await payload_benchmark()
+    elif args.games:
+        failed = await games_benchmark(runs)
+    else:
+        failed = await main_scenarios(runs)
+    await bot.close_http_session()
+    if args.record:
+        print(f"Fixtures saved to {bot.FIXTURE_DIR}/")
+    if failed:
+        print(f"{failed} failed runs")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
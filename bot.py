@@ -1,5 +1,22 @@
 import os
-import requests
+import io
+import json
+import collections
+import heapq
+import bisect
+import statistics
+import re
+import sys
+import time
+import random
+import contextlib
+import concurrent.futures
+import hashlib
+import secrets
+import sqlite3
+import threading
+import urllib.parse
+import aiohttp
 import datetime
 from zoneinfo import ZoneInfo  # Python 3.9+ for timezone support
 import discord
@@ -7,17 +24,142 @@ from discord.ext import commands, tasks
 from dotenv import load_dotenv
 import asyncio
 
+# Reference point for the time-to-ready figure reported once the bot logs in
+STARTED_AT = time.perf_counter()
+
 # Load environment variables
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 BOT_PREFIX = os.getenv("BOT_PREFIX", "!")
-CHANNEL_ID = int(os.getenv("CHANNEL_ID"))
+CHANNEL_ID = os.getenv("CHANNEL_ID")
 ADMIN_CHANNEL_ID = os.getenv("ADMIN_CHANNEL_ID") # Optional
 
 # Constants for MLB/Dodgers
 TEAM_ID = 119  # Los Angeles Dodgers
 TEAM_NAME = "Los Angeles Dodgers"
-BASE_URL = "https://statsapi.mlb.com/api"
+NL_WEST_DIVISION_ID = 203
+DIVISION_NAMES = {
+    200: "AL West",
+    201: "AL East",
+    202: "AL Central",
+    203: "NL West",
+    204: "NL East",
+    205: "NL Central",
+}
+BASE_URL = os.getenv("MLB_API_BASE_URL", "https://statsapi.mlb.com/api")
+
+# HTTP client settings for the MLB Stats API
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_SECONDS = 30
+BOXSCORE_CONCURRENCY = int(os.getenv("BOXSCORE_CONCURRENCY", "5"))
+BATTING_WINDOW_CACHE_ENTRIES = 8  # Rolling windows kept across (team, window size) pairs, least recently used dropped
+
+# Shared request policy for every MLB API call
+API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "3"))
+API_BACKOFF_BASE_SECONDS = 0.5
+API_BACKOFF_MAX_SECONDS = 8
+API_RATE_LIMIT_PER_SECOND = float(os.getenv("API_RATE_LIMIT_PER_SECOND", "10"))
+API_RATE_LIMIT_BURST = int(os.getenv("API_RATE_LIMIT_BURST", "20"))
+API_CIRCUIT_FAILURE_THRESHOLD = 5
+API_CIRCUIT_RESET_SECONDS = 60
+LAST_KNOWN_GOOD_MAX_ENTRIES = 256
+
+# Request transport: "live", "record" (live, saving responses to FIXTURE_DIR) or
+# "replay" (serve saved responses offline with optional injected latency/errors)
+HTTP_TRANSPORT = os.getenv("HTTP_TRANSPORT", "live")
+FIXTURE_DIR = os.getenv("FIXTURE_DIR", "fixtures")
+REPLAY_LATENCY_MS = float(os.getenv("REPLAY_LATENCY_MS", "0"))
+REPLAY_JITTER_MS = float(os.getenv("REPLAY_JITTER_MS", "0"))
+REPLAY_ERROR_RATE = float(os.getenv("REPLAY_ERROR_RATE", "0"))
+
+# The season schedule is loaded once a day; after SCHEDULE_TTL_SECONDS only the
+# days from SCHEDULE_REFRESH_PAST_DAYS ago through SCHEDULE_FUTURE_DAYS ahead are refetched
+SCHEDULE_PAST_DAYS = 60  # Default look-back for recent completed games
+SCHEDULE_REFRESH_PAST_DAYS = 3
+SCHEDULE_FUTURE_DAYS = 30
+SCHEDULE_TTL_SECONDS = int(os.getenv("SCHEDULE_TTL_SECONDS", "900"))
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "120"))
+STANDINGS_TTL_SECONDS = int(os.getenv("STANDINGS_TTL_SECONDS", "300"))
+
+# Persistent cache of completed-game boxscores
+BOXSCORE_CACHE_PATH = os.getenv("BOXSCORE_CACHE_PATH", "data/boxscores.sqlite3")
+BOXSCORE_CACHE_MAX_GAMES = int(os.getenv("BOXSCORE_CACHE_MAX_GAMES", "1000"))
+BOXSCORE_CACHE_MAX_AGE_DAYS = int(os.getenv("BOXSCORE_CACHE_MAX_AGE_DAYS", "400"))
+
+# Season-long store of per-game batting lines, filled by a resumable backfill job
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "data/history.sqlite3")
+HISTORY_BACKFILL = os.getenv("HISTORY_BACKFILL", "1") == "1"
+
+# Scheduled posts: produced updates, last runs and message rotations survive
+# restarts, and a post missed while the bot was down is caught up within the grace window
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "data/jobs.sqlite3")
+JOB_CATCH_UP_GRACE_MINUTES = int(os.getenv("JOB_CATCH_UP_GRACE_MINUTES", "180"))
+JOB_RETRY_MAX_MINUTES = 30  # A channel that keeps failing is retried after 1, 2, 4, ... up to 30 minutes
+
+# Opt-in live game updates (scoring plays and final scores)
+LIVE_MODE = os.getenv("LIVE_MODE", "0") == "1"
+LIVE_IDLE_SECONDS = 900  # No game in progress today
+LIVE_PREGAME_SECONDS = 300
+LIVE_PREGAME_LEAD_MINUTES = 30  # Polling starts this long before first pitch
+LIVE_IN_PROGRESS_SECONDS = 15
+LIVE_DELAY_SECONDS = 120
+
+# CPU-heavy JSON decoding and stats aggregation run in a worker pool so they don't
+# stall the event loop: "thread" (default), "process", or "inline" to run on the loop
+WORKER_POOL = os.getenv("WORKER_POOL", "thread")
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "2"))
+WORKER_MIN_JSON_BYTES = 65536  # Smaller responses decode faster than a worker round trip
+
+# Sharding: one process runs every shard Discord recommends. To split them over
+# several processes, give each the same SHARD_COUNT and its own SHARD_IDS (e.g.
+# "0,1"), and the same CACHE_BACKEND so each API payload is fetched only once:
+# "sqlite" (a file on a shared volume) or a redis:// URL (needs the redis package)
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv("SHARD_IDS", "").split(",") if shard_id.strip()] or None
+SHARD_GROUP = ",".join(str(shard_id) for shard_id in SHARD_IDS) if SHARD_IDS else "all"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "local")
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "data/shared_cache.sqlite3")
+# A fetch lock outlives api_get's worst case (every attempt timing out after
+# the longest backoff), plus a margin for rate limiting, so waiters don't fetch too
+SHARED_LOCK_TIMEOUT_SECONDS = (
+    (API_MAX_RETRIES + 1) * HTTP_TIMEOUT_SECONDS + API_MAX_RETRIES * API_BACKOFF_MAX_SECONDS + 30
+)
+SHARED_POLL_SECONDS = 0.1
+SHARED_FINAL_BOXSCORE_TTL_SECONDS = 86400
+# The sqlite backend means the processes share the data volume, and so the
+# history store: one of them fills it. Otherwise each process fills its own.
+HISTORY_DB_SHARED = CACHE_BACKEND == "sqlite"
+SHARED_LIVE_BOXSCORE_TTL_SECONDS = 60
+
+# Outgoing Discord messages. Admin log lines are posted as one digest every
+# ADMIN_DIGEST_SECONDS; stat tables can be sent as images (TABLE_IMAGES=1, needs Pillow)
+ADMIN_DIGEST_SECONDS = int(os.getenv("ADMIN_DIGEST_SECONDS", "30"))
+TABLE_IMAGES = os.getenv("TABLE_IMAGES", "0") == "1"
+TABLE_IMAGE_CACHE_ENTRIES = 64
+DISCORD_MESSAGE_LIMIT = 2000
+DISCORD_CHANNEL_SENDS_PER_SECOND = 1
+DISCORD_CHANNEL_SEND_BURST = 5
+DISCORD_GLOBAL_SENDS_PER_SECOND = 40
+
+# Optional local /metrics endpoint (disabled unless METRICS_PORT is set)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Teams followed per Discord channel, e.g. CHANNEL_TEAMS="123456:119,654321:147".
+# Without it, Dodgers updates are posted to CHANNEL_ID.
+def parse_channel_teams(value):
+    channel_teams = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        channel_id, team_id = entry.split(":")
+        channel_teams[int(channel_id)] = int(team_id)
+    return channel_teams
+
+CHANNEL_TEAMS = parse_channel_teams(os.getenv("CHANNEL_TEAMS", "")) or {int(CHANNEL_ID): TEAM_ID}
+FOLLOWED_TEAM_IDS = sorted(set(CHANNEL_TEAMS.values()))
 
 # Optional admin channel for error and status notifications
 if ADMIN_CHANNEL_ID is not None:
@@ -33,433 +175,2246 @@ async def notify_admin_channel(message):
         channel = bot.get_channel(ADMIN_CHANNEL_ID)
         if channel:
             try:
-                await channel.send(message)
+                await send_message(channel, message)
             except Exception as e:
                 print(f"[admin notify error] {e}")
 
 async def admin_log(message):
+    """
+    Prints `message` and queues it for the next admin channel digest.
+    """
     print(message)
-    await notify_admin_channel(message)
+    if ADMIN_CHANNEL_ID:
+        admin_log_pending.append(message)
+
+####################################
+# Metrics
+####################################
+class Metrics:
+    """
+    Minimal in-process counters and latency histograms, rendered in the
+    Prometheus text format for /metrics and summarized for !stats_debug.
+    Series are keyed by metric name plus a sorted tuple of label pairs.
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.counters = collections.defaultdict(float)
+        self.histograms = {}
+
+    def inc(self, name, amount=1, **labels):
+        self.counters[(name, tuple(sorted(labels.items())))] += amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = {"buckets": [0] * len(self.BUCKETS), "count": 0, "sum": 0.0, "max": 0.0}
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+        histogram["max"] = max(histogram["max"], seconds)
 
-def is_new_series_today(team_id=TEAM_ID):
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+    def render_prometheus(self):
+        lines = []
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append(f"dodgerbot_{name}{self.format_labels(labels)} {value:g}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            for bound, count in zip(self.BUCKETS, histogram["buckets"]):
+                lines.append(f"dodgerbot_{name}_bucket{self.format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"dodgerbot_{name}_bucket{self.format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"dodgerbot_{name}_sum{self.format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"dodgerbot_{name}_count{self.format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """
+        Returns a compact text table of every latency histogram and counter.
+        """
+        lines = [f"{'Timer':44s} {'N':>5s} {'Mean':>7s} {'Max':>7s}"]
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            label = name + "".join(f" {value}" for _, value in labels)
+            mean = histogram["sum"] / histogram["count"]
+            lines.append(f"{label[:44]:44s} {histogram['count']:5d} {mean:7.3f} {histogram['max']:7.3f}")
+        lines.append("")
+        lines.append(f"{'Counter':44s} {'Value':>13s}")
+        for (name, labels), value in sorted(self.counters.items()):
+            label = name + "".join(f" {value}" for _, value in labels)
+            lines.append(f"{label[:44]:44s} {value:13g}")
+        return "\n".join(lines)
+
+metrics = Metrics()
+
+def api_endpoint(url):
     """
-    Checks if the Dodgers are starting a new series today against a new opponent.
-    Returns True if yes, False otherwise.
+    Returns the API path with ids replaced, e.g. /v1/game/{id}/boxscore, for metric labels.
     """
-    today = datetime.date.today()
-    today_str = today.strftime('%Y-%m-%d')
-    
-    # Get today's game for the Dodgers.
-    schedule_url = f"{BASE_URL}/v1/schedule?teamId={team_id}&startDate={today_str}&endDate={today_str}&sportId=1"
-    response = requests.get(schedule_url)
-    if response.status_code != 200:
-        asyncio.create_task(admin_log("Error fetching schedule data for today."))
+    path = urllib.parse.urlsplit(url).path
+    base_path = urllib.parse.urlsplit(BASE_URL).path
+    if path.startswith(base_path):
+        path = path[len(base_path):]
+    return re.sub(r"/\d+", "/{id}", path)
+
+####################################
+# Worker Pool
+####################################
+worker_executor = None
+
+def get_worker_executor():
+    global worker_executor
+    if worker_executor is None:
+        if WORKER_POOL == "process":
+            worker_executor = concurrent.futures.ProcessPoolExecutor(max_workers=WORKER_COUNT)
+        else:
+            worker_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=WORKER_COUNT, thread_name_prefix="dodger-bot-worker"
+            )
+    return worker_executor
+
+def shutdown_worker_executor():
+    global worker_executor
+    if worker_executor is not None:
+        worker_executor.shutdown(wait=False, cancel_futures=True)
+        worker_executor = None
+
+async def run_in_worker(func, *args):
+    """
+    Runs `func(*args)` in the worker pool and awaits the result. With the process
+    pool, `func` must be a module-level function and its arguments and result
+    must be picklable.
+    """
+    if WORKER_POOL == "inline":
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_worker_executor(), func, *args)
+
+####################################
+# MLB Stats API Client
+####################################
+http_session = None
+
+def get_http_session():
+    """
+    Returns the shared aiohttp session, creating it on first use.
+    Every MLB API call goes through this one keep-alive connection pool, which
+    also bounds how many requests are in flight at once.
+    """
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+        )
+        http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS),
+        )
+    return http_session
+
+async def close_http_session():
+    global http_session
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+    http_session = None
+
+class LiveTransport:
+    """
+    Sends requests to the MLB Stats API over the shared aiohttp session.
+    Transports return (status, headers, body) and count the requests they serve.
+    """
+    def __init__(self):
+        self.request_count = 0
+
+    async def get(self, url, params=None, headers=None):
+        self.request_count += 1
+        session = get_http_session()
+        async with session.get(url, params=params, headers=headers) as response:
+            return response.status, response.headers.copy(), await response.read()
+
+def fixture_path(url, params=None):
+    """
+    Maps a request to its fixture file: the API path plus a short hash of the query.
+    """
+    parts = urllib.parse.urlsplit(url)
+    query = dict(urllib.parse.parse_qsl(parts.query))
+    query.update(params or {})
+    digest = hashlib.sha1(urllib.parse.urlencode(sorted(query.items())).encode()).hexdigest()[:12]
+    name = parts.path.strip("/").replace("/", "_")
+    return os.path.join(FIXTURE_DIR, f"{name}-{digest}.json")
+
+class RecordingTransport(LiveTransport):
+    """
+    Live transport that also saves every successful response body under FIXTURE_DIR.
+    """
+    async def get(self, url, params=None, headers=None):
+        status, response_headers, body = await super().get(url, params=params, headers=headers)
+        if status == 200:
+            path = fixture_path(url, params)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(body)
+        return status, response_headers, body
+
+class ReplayTransport:
+    """
+    Serves recorded responses from FIXTURE_DIR without touching the network.
+    Each request waits `latency_ms` plus up to `jitter_ms`, and fails with a 503
+    at `error_rate`. When a request was never recorded (e.g. a schedule query for
+    a different date range), the newest recording of the same endpoint is used;
+    without one it answers 404 and counts the request in `missing_count`.
+    """
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.request_count = 0
+        self.missing_count = 0
+
+    async def get(self, url, params=None, headers=None):
+        self.request_count += 1
+        delay_ms = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if random.random() < self.error_rate:
+            return 503, {}, b""
+
+        path = fixture_path(url, params)
+        if not os.path.exists(path):
+            prefix = os.path.basename(path).rsplit("-", 1)[0] + "-"
+            candidates = [
+                os.path.join(FIXTURE_DIR, name)
+                for name in os.listdir(FIXTURE_DIR) if name.startswith(prefix)
+            ] if os.path.isdir(FIXTURE_DIR) else []
+            if not candidates:
+                self.missing_count += 1
+                return 404, {}, b""
+            path = max(candidates, key=os.path.getmtime)
+        with open(path, "rb") as f:
+            return 200, {}, f.read()
+
+def create_transport(mode):
+    if mode == "record":
+        return RecordingTransport()
+    if mode == "replay":
+        return ReplayTransport(REPLAY_LATENCY_MS, REPLAY_JITTER_MS, REPLAY_ERROR_RATE)
+    return LiveTransport()
+
+transport = create_transport(HTTP_TRANSPORT)
+
+####################################
+# Shared Cache: one fetcher across shards and processes
+####################################
+class SQLiteSharedCache:
+    """
+    Shared cache and lock backend in a SQLite file, for processes on one host
+    that share the data volume. Queries run in a thread, since another process
+    holding the write lock can block them for up to the busy timeout.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.db = None
+        self.lock = threading.Lock()  # One query at a time on the shared connection
+
+    def connect(self):
+        # Opened on first use, like the other stores, to keep it off the import path
+        with db_open_lock:
+            if self.db is None:
+                cache_dir = os.path.dirname(self.path)
+                if cache_dir:
+                    os.makedirs(cache_dir, exist_ok=True)
+                db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                with db:
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+                    )
+                    db.execute("CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expires_at)")
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+                    )
+                self.db = db
+        return self.db
+
+    def read(self, key):
+        db = self.connect()
+        with self.lock:
+            row = db.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def write(self, key, value, ttl):
+        db = self.connect()
+        now = time.time()
+        with self.lock, db:
+            db.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, value, now + ttl))
+
+    def try_lock(self, key, ttl):
+        db = self.connect()
+        token = secrets.token_hex(8)
+        now = time.time()
+        with self.lock, db:
+            db.execute("DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now))
+            acquired = db.execute(
+                "INSERT OR IGNORE INTO locks VALUES (?, ?, ?)", (key, token, now + ttl)
+            ).rowcount == 1
+        return token if acquired else None
+
+    def unlock(self, key, token):
+        db = self.connect()
+        with self.lock, db:
+            db.execute("DELETE FROM locks WHERE key = ? AND token = ?", (key, token))
+
+    async def get(self, key):
+        return await asyncio.to_thread(self.read, key)
+
+    async def set(self, key, value, ttl):
+        await asyncio.to_thread(self.write, key, value, ttl)
+
+    async def acquire(self, key, ttl):
+        return await asyncio.to_thread(self.try_lock, key, ttl)
+
+    async def release(self, key, token):
+        await asyncio.to_thread(self.unlock, key, token)
+
+class RedisSharedCache:
+    """
+    Shared cache and lock backend on a Redis-compatible server (Redis, Valkey,
+    KeyDB, ...), for processes on several hosts. Needs the `redis` package.
+    """
+    # Deletes the lock only if it is still held with our token.
+    RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url):
+        import redis.asyncio  # Optional dependency, only needed for this backend
+        self.client = redis.asyncio.from_url(url)
+
+    async def get(self, key):
+        return await self.client.get(f"dodgerbot:cache:{key}")
+
+    async def set(self, key, value, ttl):
+        await self.client.set(f"dodgerbot:cache:{key}", value, px=int(ttl * 1000))
+
+    async def acquire(self, key, ttl):
+        token = secrets.token_hex(8)
+        acquired = await self.client.set(f"dodgerbot:lock:{key}", token, nx=True, px=int(ttl * 1000))
+        return token if acquired else None
+
+    async def release(self, key, token):
+        await self.client.eval(self.RELEASE_SCRIPT, 1, f"dodgerbot:lock:{key}", token)
+
+def create_shared_cache(backend):
+    if backend == "sqlite":
+        return SQLiteSharedCache(SHARED_CACHE_PATH)
+    if backend.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSharedCache(backend)
+    return None  # "local": a single process, nothing to share
+
+shared_cache = create_shared_cache(CACHE_BACKEND)
+
+async def fetch_once(key, ttl, fetch):
+    """
+    Single-fetcher read through the shared cache. Returns the bytes cached under
+    `key`; on a miss exactly one worker across all processes calls `fetch()` and
+    publishes the result for `ttl` seconds while the others wait for it. A
+    worker that waits longer than SHARED_LOCK_TIMEOUT_SECONDS fetches by itself.
+    """
+    deadline = time.monotonic() + SHARED_LOCK_TIMEOUT_SECONDS
+    while True:
+        value = await shared_cache.get(key)
+        if value is not None:
+            metrics.inc("cache_hits_total", cache="shared")
+            return value
+        token = await shared_cache.acquire(f"fetch:{key}", SHARED_LOCK_TIMEOUT_SECONDS)
+        if token is not None:
+            try:
+                # Another worker may have published it just before we got the lock.
+                value = await shared_cache.get(key)
+                if value is None:
+                    metrics.inc("cache_misses_total", cache="shared")
+                    value = await fetch()
+                    if value is not None:
+                        await shared_cache.set(key, value, ttl)
+                return value
+            finally:
+                await shared_cache.release(f"fetch:{key}", token)
+        if time.monotonic() > deadline:
+            return await fetch()
+        await asyncio.sleep(SHARED_POLL_SECONDS)
+
+@contextlib.asynccontextmanager
+async def run_exclusively(name, ttl):
+    """
+    Yields True in exactly one process at a time for the job `name`, for
+    background work that all shards would otherwise repeat. Always yields True
+    without a shared cache backend.
+    """
+    if shared_cache is None:
+        yield True
+        return
+    token = await shared_cache.acquire(f"job:{name}", ttl)
+    try:
+        yield token is not None
+    finally:
+        if token is not None:
+            await shared_cache.release(f"job:{name}", token)
+
+####################################
+# Request Policy: rate limit, retries and circuit breaker
+####################################
+class ApiUnavailableError(Exception):
+    pass
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: allows bursts of up to `capacity` requests and
+    `rate` requests per second on average.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class CircuitBreaker:
+    """
+    Stops calling the API after `failure_threshold` consecutive failed requests.
+    While open, calls fail fast; after `reset_seconds` a single probe request is
+    let through and its outcome closes or re-opens the circuit. A probe that ends
+    without reporting back (e.g. cancelled) is replaced by a new one after
+    another `reset_seconds`, so the circuit can't stay half-open. record_failure()
+    and record_success() return True only on the transitions into and out of an
+    outage, so the admin channel is alerted once per outage.
+    """
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.outage_started_at = None
+
+    def allow(self):
+        now = time.monotonic()
+        if self.state in ("open", "half-open") and now - self.opened_at >= self.reset_seconds:
+            self.state = "half-open"
+            self.opened_at = now  # When the probe was let through
+            return True
+        return self.state == "closed"
+
+    def record_success(self):
+        recovered = self.outage_started_at is not None
+        self.failures = 0
+        self.state = "closed"
+        self.outage_started_at = None
+        return recovered
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            if self.outage_started_at is None:
+                self.outage_started_at = self.opened_at
+                return True
         return False
-    data = response.json()
-    if not data.get("dates"):
-        return False  # No game today.
-    
-    today_game = None
-    for date_record in data.get("dates", []):
-        for game in date_record.get("games", []):
-            if game.get("gameType") == "R":  # Consider only regular season games.
-                today_game = game
-                break
-        if today_game:
+
+rate_limiter = TokenBucket(API_RATE_LIMIT_PER_SECOND, API_RATE_LIMIT_BURST)
+circuit_breaker = CircuitBreaker(API_CIRCUIT_FAILURE_THRESHOLD, API_CIRCUIT_RESET_SECONDS)
+
+def retry_delay(attempt, response_headers=None):
+    """
+    Exponential backoff with full jitter, honoring a numeric Retry-After header.
+    """
+    retry_after = (response_headers or {}).get("Retry-After", "")
+    if retry_after.isdigit():
+        return min(API_BACKOFF_MAX_SECONDS, int(retry_after))
+    return random.uniform(0, min(API_BACKOFF_MAX_SECONDS, API_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+async def api_get(url, params=None, headers=None):
+    """
+    Sends a request through the active transport under the shared request policy:
+    token-bucket rate limiting, up to API_MAX_RETRIES retries with backoff on
+    timeouts, connection errors, 429 and 5xx responses, and the circuit breaker.
+    Records latency, status, bytes downloaded and errors per endpoint.
+    Raises ApiUnavailableError while the circuit is open.
+    """
+    endpoint = api_endpoint(url)
+    for attempt in range(API_MAX_RETRIES + 1):
+        if not circuit_breaker.allow():
+            metrics.inc("api_short_circuited_total", endpoint=endpoint)
+            raise ApiUnavailableError(f"MLB API unavailable (circuit open), skipped {endpoint}")
+        await rate_limiter.acquire()
+
+        start = time.perf_counter()
+        failure = None
+        response_headers = None
+        try:
+            status, response_headers, body = await transport.get(url, params=params, headers=headers)
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            metrics.inc("api_errors_total", endpoint=endpoint, error=type(e).__name__)
+            failure = e
+        finally:
+            metrics.observe("api_request_seconds", time.perf_counter() - start, endpoint=endpoint)
+
+        if failure is None:
+            metrics.inc("api_requests_total", endpoint=endpoint, status=status)
+            metrics.inc("api_bytes_total", len(body), endpoint=endpoint)
+            if status not in (200, 304):
+                metrics.inc("api_errors_total", endpoint=endpoint, error=str(status))
+            if status < 500 and status != 429:
+                if circuit_breaker.record_success():
+                    await admin_log(":white_check_mark: MLB API has recovered.")
+                return status, response_headers, body
+
+        if circuit_breaker.record_failure():
+            reason = type(failure).__name__ if failure is not None else f"HTTP {status}"
+            await admin_log(f":rotating_light: MLB API is failing ({reason} on {endpoint}). Serving cached data until it recovers.")
+        if attempt == API_MAX_RETRIES:
             break
-    if not today_game:
-        return False
+        metrics.inc("api_retries_total", endpoint=endpoint)
+        await asyncio.sleep(retry_delay(attempt, response_headers))
 
-    # Determine today's opponent.
-    # The API returns a "teams" dict with "home" and "away".
-    if today_game["teams"]["away"]["team"]["id"] == team_id:
-        opponent_id = today_game["teams"]["home"]["team"]["id"]
-    else:
-        opponent_id = today_game["teams"]["away"]["team"]["id"]
-
-    # Fetch past 30 days of regular season games (if any) for the Dodgers.
-    start_date_past = (today - datetime.timedelta(days=30)).strftime('%Y-%m-%d')
-    yesterday = (today - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
-    past_schedule_url = f"{BASE_URL}/v1/schedule?teamId={team_id}&startDate={start_date_past}&endDate={yesterday}&sportId=1"
-    response_past = requests.get(past_schedule_url)
-    if response_past.status_code != 200:
-        asyncio.create_task(admin_log("Error fetching past schedule data."))
-        # In case of error, we assume it might be a new series.
-        return True
-    data_past = response_past.json()
-    
-    # Find the most recent previous regular season game.
-    last_game = None
-    last_game_date = None
-    for date_record in data_past.get("dates", []):
-        game_date = datetime.datetime.strptime(date_record.get("date"), '%Y-%m-%d').date()
-        for game in date_record.get("games", []):
-            if game.get("gameType") == "R":
-                if last_game_date is None or game_date > last_game_date:
-                    last_game = game
-                    last_game_date = game_date
-                    
-    # If there was no previous game, assume it is the first game (thus a new series).
-    if last_game is None:
-        return True
-
-    # Determine the opponent in the last game.
-    if last_game["teams"]["away"]["team"]["id"] == team_id:
-        last_opponent_id = last_game["teams"]["home"]["team"]["id"]
-    else:
-        last_opponent_id = last_game["teams"]["away"]["team"]["id"]
+    if failure is not None:
+        raise failure
+    return status, response_headers, body
+
+async def decode_json(url, body):
+    with metrics.timer("json_parse_seconds", endpoint=api_endpoint(url)):
+        if len(body) < WORKER_MIN_JSON_BYTES:
+            return json.loads(body)
+        return await run_in_worker(json.loads, body)
+
+# Body of the last successful response per request, served while the API is failing
+last_known_good = collections.OrderedDict()
+
+def request_key(url, params=None):
+    return url + "?" + urllib.parse.urlencode(sorted((params or {}).items()))
+
+async def fetch_body(url, params=None):
+    """
+    Returns the body of a successful response, or None if the status is not 200.
+    """
+    status, _, body = await api_get(url, params=params)
+    return body if status == 200 else None
+
+async def fetch_json(url, params=None, shared_ttl=None):
+    """
+    Performs a GET request against the MLB Stats API and returns the decoded JSON.
+    If the request fails, the last good response for the same request is returned
+    instead. Without one, returns None if the response status is not 200, and
+    timeouts, connection errors and ApiUnavailableError are raised to the caller.
+    With a shared cache backend and `shared_ttl`, the response is fetched by one
+    process and reused by every other one for `shared_ttl` seconds.
+    """
+    key = request_key(url, params)
+    try:
+        if shared_cache is not None and shared_ttl:
+            body = await fetch_once(key, shared_ttl, lambda: fetch_body(url, params))
+        else:
+            body = await fetch_body(url, params)
+    except Exception:
+        if key in last_known_good:
+            metrics.inc("api_stale_responses_total", endpoint=api_endpoint(url))
+            return await decode_json(url, last_known_good[key])
+        raise
+    if body is None:
+        if key in last_known_good:
+            metrics.inc("api_stale_responses_total", endpoint=api_endpoint(url))
+            return await decode_json(url, last_known_good[key])
+        return None
+
+    data = await decode_json(url, body)
+    # Keep the raw body rather than the decoded JSON; it is far smaller and only
+    # needs decoding again in the rare case that it is served.
+    last_known_good[key] = body
+    last_known_good.move_to_end(key)
+    while len(last_known_good) > LAST_KNOWN_GOOD_MAX_ENTRIES:
+        last_known_good.popitem(last=False)
+    return data
+
+async def fetch_json_if_changed(url, params=None, validators=None):
+    """
+    Conditional GET: sends the ETag / Last-Modified validators saved from the
+    previous response and returns (data, validators). `data` is None when the
+    server answers 304 Not Modified. Any other non-200 status raises.
+    """
+    headers = {}
+    if validators:
+        if "ETag" in validators:
+            headers["If-None-Match"] = validators["ETag"]
+        if "Last-Modified" in validators:
+            headers["If-Modified-Since"] = validators["Last-Modified"]
+    status, response_headers, body = await api_get(url, params=params, headers=headers)
+    if status == 304:
+        return None, validators
+    if status != 200:
+        raise Exception(f"Error fetching {url}: {status}")
+    new_validators = {
+        key: response_headers[key]
+        for key in ("ETag", "Last-Modified")
+        if key in response_headers
+    }
+    return await decode_json(url, body), new_validators
+
+####################################
+# Boxscore Cache
+####################################
+# Only these batting fields are kept from a boxscore. Bump the cache version
+# whenever this list changes so older rows are refetched.
+BATTING_FIELDS = ("atBats", "hits", "homeRuns", "rbi", "baseOnBalls", "hitByPitch", "sacFlies", "totalBases")
+BOXSCORE_CACHE_VERSION = 2
+
+# `fields=` filter for the boxscore endpoint so the API only sends the team ids
+# and player batting lines instead of the full boxscore document.
+BOXSCORE_FIELDS = ",".join(
+    ("teams", "home", "away", "team", "id", "players", "person", "fullName", "stats", "batting")
+    + BATTING_FIELDS
+)
+
+boxscore_cache_db = None
+# The SQLite stores may first be opened by the startup warm-up in a worker thread.
+db_open_lock = threading.Lock()
 
-    # If today's opponent is different from the opponent in the last game, it's a new series.
-    return opponent_id != last_opponent_id
+def get_boxscore_cache():
+    """
+    Opens the SQLite boxscore cache on first use, creating the table if needed.
+    """
+    global boxscore_cache_db
+    with db_open_lock:
+        if boxscore_cache_db is None:
+            cache_dir = os.path.dirname(BOXSCORE_CACHE_PATH)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            db = sqlite3.connect(BOXSCORE_CACHE_PATH, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS boxscores ("
+                "game_pk INTEGER PRIMARY KEY, "
+                "version INTEGER NOT NULL, "
+                "stored_at REAL NOT NULL, "
+                "data TEXT NOT NULL)"
+            )
+            prune_boxscore_cache(db)
+            boxscore_cache_db = db
+    return boxscore_cache_db
+
+def prune_boxscore_cache(db):
+    """
+    Evicts rows older than BOXSCORE_CACHE_MAX_AGE_DAYS, rows written by an older
+    cache version, and the oldest rows beyond BOXSCORE_CACHE_MAX_GAMES.
+    """
+    cutoff = time.time() - BOXSCORE_CACHE_MAX_AGE_DAYS * 86400
+    with db:
+        db.execute(
+            "DELETE FROM boxscores WHERE stored_at < ? OR version != ?",
+            (cutoff, BOXSCORE_CACHE_VERSION),
+        )
+        db.execute(
+            "DELETE FROM boxscores WHERE game_pk NOT IN "
+            "(SELECT game_pk FROM boxscores ORDER BY stored_at DESC LIMIT ?)",
+            (BOXSCORE_CACHE_MAX_GAMES,),
+        )
 
-def upcoming_regular_season_game_exists(team_id, max_days=30):
+def load_cached_boxscore(game_pk):
+    """
+    Returns the cached boxscore for `game_pk`, or None if it is not cached.
+    """
+    db = get_boxscore_cache()
+    row = db.execute(
+        "SELECT data FROM boxscores WHERE game_pk = ? AND version = ?",
+        (game_pk, BOXSCORE_CACHE_VERSION),
+    ).fetchone()
+    if row is None:
+        metrics.inc("cache_misses_total", cache="boxscore")
+        return None
+    metrics.inc("cache_hits_total", cache="boxscore")
+    return json.loads(row[0])
+
+def store_cached_boxscore(game_pk, boxscore):
+    db = get_boxscore_cache()
+    with db:
+        db.execute(
+            "INSERT OR REPLACE INTO boxscores (game_pk, version, stored_at, data) VALUES (?, ?, ?, ?)",
+            (game_pk, BOXSCORE_CACHE_VERSION, time.time(), json.dumps(boxscore, separators=(",", ":"))),
+        )
+    prune_boxscore_cache(db)
+
+def slim_boxscore(boxscore):
+    """
+    Reduces a full boxscore to the team ids and player batting lines that the
+    stats functions read, keeping the same nested layout.
+    """
+    teams = {}
+    for side in ("home", "away"):
+        team_box = boxscore.get("teams", {}).get(side, {})
+        players = {}
+        for player_key, player_info in team_box.get("players", {}).items():
+            batting_stats = player_info.get("stats", {}).get("batting")
+            if not batting_stats:
+                continue
+            person = player_info.get("person", {})
+            players[player_key] = {
+                "person": {"id": person.get("id"), "fullName": person.get("fullName", "Unknown")},
+                "stats": {"batting": {field: batting_stats.get(field, 0) for field in BATTING_FIELDS}},
+            }
+        teams[side] = {
+            "team": {"id": team_box.get("team", {}).get("id")},
+            "players": players,
+        }
+    return {"teams": teams}
+
+####################################
+# Data Model
+####################################
+# API payloads are parsed into these slotted records as soon as they arrive and
+# the JSON is dropped, so long-lived caches only hold the fields the bot reads.
+# Repeated strings (states, team names, dates) are interned and shared.
+class Game:
+    """
+    One scheduled game from the schedule endpoint.
+    """
+    __slots__ = (
+        "game_pk", "game_type", "game_date", "official_date", "state", "detailed_state",
+        "home_id", "home_name", "away_id", "away_name", "series_game_number",
+    )
+
+    def __init__(self, game_pk, game_type, game_date, official_date, state, detailed_state,
+                 home_id, home_name, away_id, away_name, series_game_number=None):
+        self.game_pk = game_pk
+        self.game_type = game_type
+        self.game_date = game_date
+        self.official_date = official_date
+        self.state = state
+        self.detailed_state = detailed_state
+        self.home_id = home_id
+        self.home_name = home_name
+        self.away_id = away_id
+        self.away_name = away_name
+        self.series_game_number = series_game_number
+
+    @classmethod
+    def from_api(cls, game):
+        teams = game.get("teams", {})
+        home_team = teams.get("home", {}).get("team", {})
+        away_team = teams.get("away", {}).get("team", {})
+        status = game.get("status", {})
+        game_date = game.get("gameDate", "")
+        return cls(
+            game.get("gamePk"),
+            sys.intern(game.get("gameType", "")),
+            game_date,
+            sys.intern(game.get("officialDate") or game_date[:10]),
+            sys.intern(status.get("abstractGameState", "")),
+            sys.intern(status.get("detailedState", "")),
+            home_team.get("id"),
+            sys.intern(home_team.get("name", "Unknown")),
+            away_team.get("id"),
+            sys.intern(away_team.get("name", "Unknown")),
+            game.get("seriesGameNumber"),
+        )
+
+    @property
+    def team_ids(self):
+        return (self.home_id, self.away_id)
+
+    @property
+    def is_final(self):
+        return self.state == "Final"
+
+    @property
+    def start_time(self):
+        """
+        First pitch as an aware UTC datetime, or None if the game has no start time.
+        """
+        try:
+            return datetime.datetime.fromisoformat(self.game_date.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+
+    @property
+    def is_postponed(self):
+        # Postponed games are listed again on their makeup date.
+        return self.detailed_state.startswith(("Postponed", "Cancelled"))
+
+    def opponent(self, team_id):
+        """
+        Returns (id, name) of the team playing `team_id` in this game.
+        """
+        if self.home_id == team_id:
+            return self.away_id, self.away_name
+        return self.home_id, self.home_name
+
+def parse_schedule_games(data):
+    """
+    Returns the Game records of a schedule response, in date order.
+    """
+    return [Game.from_api(game) for date_obj in data.get("dates", []) for game in date_obj.get("games", [])]
+
+class TeamRecord:
+    """
+    One team's line in the division standings.
+    """
+    __slots__ = ("team_id", "name", "wins", "losses", "winning_percentage", "games_back")
+
+    def __init__(self, team_id, name, wins, losses, winning_percentage, games_back):
+        self.team_id = team_id
+        self.name = name
+        self.wins = wins
+        self.losses = losses
+        self.winning_percentage = winning_percentage
+        self.games_back = games_back
+
+    @classmethod
+    def from_api(cls, team_record):
+        team = team_record.get("team", {})
+        return cls(
+            team.get("id"),
+            sys.intern(team.get("name", "Unknown")),
+            team_record.get("wins", 0),
+            team_record.get("losses", 0),
+            team_record.get("winningPercentage", "N/A"),
+            team_record.get("gamesBack", "0"),
+        )
+
+class BattingLine:
+    """
+    A player's counting batting stats (BATTING_FIELDS) for one game or summed
+    over several, with the rate stats derived on demand.
+    """
+    __slots__ = ("name",) + BATTING_FIELDS
+
+    def __init__(self, name, *counts):
+        self.name = name
+        for field, count in zip(BATTING_FIELDS, counts or (0,) * len(BATTING_FIELDS)):
+            setattr(self, field, count)
+
+    @classmethod
+    def from_api(cls, name, batting_stats):
+        return cls(sys.intern(name), *(int(batting_stats.get(field, 0)) for field in BATTING_FIELDS))
+
+    def counts(self):
+        return tuple(getattr(self, field) for field in BATTING_FIELDS)
+
+    def copy(self):
+        return BattingLine(self.name, *self.counts())
+
+    def add(self, other):
+        for field in BATTING_FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def subtract(self, other):
+        for field in BATTING_FIELDS:
+            setattr(self, field, getattr(self, field) - getattr(other, field))
+
+    @property
+    def avg(self):
+        return self.hits / self.atBats if self.atBats > 0 else 0
+
+    @property
+    def obp(self):
+        times_on_base = self.hits + self.baseOnBalls + self.hitByPitch
+        plate_appearances = self.atBats + self.baseOnBalls + self.hitByPitch + self.sacFlies
+        return times_on_base / plate_appearances if plate_appearances > 0 else 0
+
+    @property
+    def slg(self):
+        return self.totalBases / self.atBats if self.atBats > 0 else 0
+
+    @property
+    def ops(self):
+        return self.obp + self.slg
+
+####################################
+# Schedule Index
+####################################
+class ScheduleIndex:
+    """
+    In-memory index over the season schedule of every followed team.
+    The whole season is loaded once a day; within the day, refresh() replaces
+    only a short window around today so game states stay current. Games are
+    indexed by gamePk, by (team, date), and per team in date order, so the
+    schedule helpers answer from memory with dict lookups or a bisect.
+    """
+    def __init__(self, season, dates):
+        self.season = season
+        self.loaded_on = datetime.date.today()
+        self.refreshed_at = time.monotonic()
+        self.games_by_date = {}
+        self.add_dates(dates)
+
+    def add_dates(self, dates):
+        for date_record in dates:
+            game_date = datetime.datetime.strptime(date_record.get("date"), '%Y-%m-%d').date()
+            self.games_by_date[game_date] = [Game.from_api(game) for game in date_record.get("games", [])]
+        self.rebuild()
+
+    def refresh(self, start_date, end_date, dates):
+        """
+        Replaces every game dated from `start_date` to `end_date` with `dates`.
+        """
+        for game_date in [d for d in self.games_by_date if start_date <= d <= end_date]:
+            del self.games_by_date[game_date]
+        self.refreshed_at = time.monotonic()
+        self.add_dates(dates)
+
+    def rebuild(self):
+        self.games_by_pk = {}
+        self.games_by_team_date = {}
+        self.team_games = {}  # team_id -> [(date, game)] in date order
+        self.team_regular_dates = {}  # team_id -> sorted dates with a regular season game
+        for game_date in sorted(self.games_by_date):
+            for game in self.games_by_date[game_date]:
+                if game.is_postponed:
+                    continue
+                self.games_by_pk[game.game_pk] = game
+                for team_id in game.team_ids:
+                    self.games_by_team_date.setdefault((team_id, game_date), []).append(game)
+                    self.team_games.setdefault(team_id, []).append((game_date, game))
+                    if game.game_type == "R":
+                        dates = self.team_regular_dates.setdefault(team_id, [])
+                        if not dates or dates[-1] != game_date:
+                            dates.append(game_date)
+
+    def covers(self, start_date):
+        return start_date.year >= self.season
+
+    def is_current(self, today):
+        return self.loaded_on == today
+
+    def is_fresh(self):
+        return time.monotonic() - self.refreshed_at < SCHEDULE_TTL_SECONDS
+
+    def games_on(self, team_id, game_date, game_type=None):
+        games = self.games_by_team_date.get((team_id, game_date), [])
+        if game_type is not None:
+            games = [game for game in games if game.game_type == game_type]
+        return games
+
+    def next_regular_season_date(self, team_id, on_or_after):
+        dates = self.team_regular_dates.get(team_id, [])
+        i = bisect.bisect_left(dates, on_or_after)
+        return dates[i] if i < len(dates) else None
+
+    def previous_regular_season_date(self, team_id, before):
+        dates = self.team_regular_dates.get(team_id, [])
+        i = bisect.bisect_left(dates, before)
+        return dates[i - 1] if i > 0 else None
+
+    def games_between(self, start_date, end_date, team_id):
+        """
+        Returns the games for `team_id` dated from `start_date` to `end_date` inclusive,
+        in date order.
+        """
+        team_games = self.team_games.get(team_id, [])
+        dates = [game_date for game_date, _ in team_games]
+        lo = bisect.bisect_left(dates, start_date)
+        hi = bisect.bisect_right(dates, end_date)
+        return [game for _, game in team_games[lo:hi]]
+
+schedule_index = None
+schedule_lock = asyncio.Lock()
+
+async def fetch_schedule_dates(**query):
+    team_ids = ",".join(str(team_id) for team_id in FOLLOWED_TEAM_IDS)
+    query_str = "&".join(f"{key}={value}" for key, value in query.items())
+    schedule_url = f"{BASE_URL}/v1/schedule?teamId={team_ids}&sportId=1&{query_str}"
+    data = await fetch_json(schedule_url, shared_ttl=SCHEDULE_TTL_SECONDS)
+    if data is None:
+        raise Exception("Error fetching schedule data")
+    return data.get("dates", [])
+
+async def get_schedule_index():
+    """
+    Returns the shared schedule index. The season schedule of every followed team
+    is loaded with one request on the first call of each day; when the index is
+    older than SCHEDULE_TTL_SECONDS, only the days from SCHEDULE_REFRESH_PAST_DAYS
+    before today through SCHEDULE_FUTURE_DAYS after it are refetched.
+    """
+    global schedule_index
+    async with schedule_lock:
+        today = datetime.date.today()
+        if schedule_index is not None and schedule_index.is_current(today) and schedule_index.is_fresh():
+            metrics.inc("cache_hits_total", cache="schedule")
+            return schedule_index
+        metrics.inc("cache_misses_total", cache="schedule")
+
+        if schedule_index is None or not schedule_index.is_current(today):
+            dates = await fetch_schedule_dates(season=today.year)
+            schedule_index = ScheduleIndex(today.year, dates)
+        else:
+            start_date = today - datetime.timedelta(days=SCHEDULE_REFRESH_PAST_DAYS)
+            end_date = today + datetime.timedelta(days=SCHEDULE_FUTURE_DAYS)
+            dates = await fetch_schedule_dates(
+                startDate=start_date.strftime('%Y-%m-%d'),
+                endDate=end_date.strftime('%Y-%m-%d'),
+            )
+            schedule_index.refresh(start_date, end_date, dates)
+        return schedule_index
+
+####################################
+# Command Result Cache
+####################################
+class ResultCache:
+    """
+    Short-lived cache of rendered command output with in-flight coalescing.
+    Concurrent calls for the same key share one computation, and the result is
+    reused for `ttl` seconds as long as the caller's `version` is unchanged.
+    Failed computations are not cached.
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.entries = {}  # key -> (expires_at, version, value)
+        self.in_flight = {}  # (key, version) -> future
+
+    async def get(self, key, version, factory):
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic() and entry[1] == version:
+            metrics.inc("cache_hits_total", cache="result")
+            return entry[2]
+
+        flight_key = (key, version)
+        future = self.in_flight.get(flight_key)
+        if future is None:
+            metrics.inc("cache_misses_total", cache="result")
+            future = asyncio.ensure_future(factory())
+            self.in_flight[flight_key] = future
+
+            def store(done):
+                self.in_flight.pop(flight_key, None)
+                if not done.cancelled() and done.exception() is None:
+                    self.entries[key] = (time.monotonic() + self.ttl, version, done.result())
+
+            future.add_done_callback(store)
+        else:
+            metrics.inc("coalesced_requests_total", cache="result")
+        return await asyncio.shield(future)
+
+result_cache = ResultCache(RESULT_CACHE_TTL_SECONDS)
+
+async def latest_final_game_pk(team_id=None):
+    """
+    Returns the gamePk of the most recent Final game in the schedule index, for
+    `team_id` or for any followed team. Cached results keyed on it are
+    invalidated as soon as a new game goes Final.
+    """
+    index = await get_schedule_index()
+    finals = [
+        (game.game_date, game.game_pk)
+        for game in index.games_by_pk.values()
+        if game.is_final and (team_id is None or team_id in game.team_ids)
+    ]
+    return max(finals)[1] if finals else None
+
+async def check_new_series_today(team_id=TEAM_ID):
+    """
+    Checks if the Dodgers are starting a new series today.
+    Uses the API's seriesGameNumber, so back-to-back series against the same
+    opponent and series that follow an off-day are detected correctly.
+    Returns True if yes, False otherwise. Errors fetching the schedule are
+    raised to the caller.
+    """
+    today = datetime.date.today()
+    index = await get_schedule_index()
+
+    # Get today's first regular season game for the Dodgers.
+    today_games = index.games_on(team_id, today, game_type="R")
+    if not today_games:
+        return False  # No game today.
+    today_game = today_games[0]
+
+    series_game_number = today_game.series_game_number
+    if series_game_number is not None:
+        return series_game_number == 1
+
+    # Without series data, compare the opponent with the previous regular season game.
+    last_date = index.previous_regular_season_date(team_id, today)
+    if last_date is None:
+        return True  # First game of the season, thus a new series.
+    last_game = index.games_on(team_id, last_date, game_type="R")[-1]
+    return today_game.opponent(team_id)[0] != last_game.opponent(team_id)[0]
+
+async def is_new_series_today(team_id=TEAM_ID):
+    """
+    Same as check_new_series_today, but returns False if the schedule can't be fetched.
+    """
+    try:
+        return await check_new_series_today(team_id)
+    except Exception as e:
+        await admin_log(f"Error fetching schedule data for today: {e}")
+        return False
+
+async def check_upcoming_regular_season_game(team_id, max_days=SCHEDULE_FUTURE_DAYS):
     """
     Checks if at least one Regular season game exists for the given team within the next `max_days`.
-    Returns True if found, False otherwise.
+    Returns True if found, False otherwise. Errors fetching the schedule are
+    raised to the caller.
     """
     today = datetime.date.today()
-    end_date = today + datetime.timedelta(days=max_days)
-    start_date_str = today.strftime('%Y-%m-%d')
-    end_date_str = end_date.strftime('%Y-%m-%d')
-    
-    schedule_url = f"{BASE_URL}/v1/schedule?teamId={team_id}&startDate={start_date_str}&endDate={end_date_str}&sportId=1"
-    response = requests.get(schedule_url)
-    if response.status_code != 200:
-        asyncio.create_task(admin_log("Error fetching upcoming schedule data."))
+    index = await get_schedule_index()
+
+    # The API designates regular season games with gameType "R".
+    next_date = index.next_regular_season_date(team_id, today)
+    return next_date is not None and next_date <= today + datetime.timedelta(days=max_days)
+
+async def upcoming_regular_season_game_exists(team_id, max_days=SCHEDULE_FUTURE_DAYS):
+    """
+    Same as check_upcoming_regular_season_game, but returns False if the schedule can't be fetched.
+    """
+    try:
+        return await check_upcoming_regular_season_game(team_id, max_days=max_days)
+    except Exception as e:
+        await admin_log(f"Error fetching upcoming schedule data: {e}")
         return False
-    
-    data = response.json()
-    
-    # Loop through all scheduled game dates
-    for date_record in data.get("dates", []):
-        for game in date_record.get("games", []):
-            # Check if the game is a Regular season game.
-            # The API designates regular season games with gameType "R".
-            if game.get("gameType") == "R":
-                return True
-    return False
   
-def get_today_opponent(team_id):
+def team_nickname(team_name):
     """
-    Retrieve the opponent for today's regular season game for the given team.
-    Returns the opponent's nickname (without the city name) if found; otherwise returns "Unknown".
+    Returns a team's nickname without the city name, e.g. "Dodgers" or "Red Sox".
     """
     # Define multi-word team names here
     multi_word_teams = {"Red Sox", "White Sox", "Blue Jays"}
-    
+
+    # Check if for multi-word teams in the team name
+    for indicator in multi_word_teams:
+        if indicator in team_name:
+            return indicator
+    # Otherwise, return the last token (nickname)
+    return team_name.split()[-1]
+
+async def find_today_opponent(team_id):
+    """
+    Retrieve the opponent for today's regular season game for the given team.
+    Returns the opponent's nickname (without the city name) if found; otherwise returns "Unknown".
+    Errors fetching the schedule are raised to the caller.
+    """
     today = datetime.date.today()
-    date_str = today.strftime('%Y-%m-%d')
-    schedule_url = f"{BASE_URL}/v1/schedule?teamId={team_id}&startDate={date_str}&endDate={date_str}&sportId=1"
-    try:
-        response = requests.get(schedule_url)
-        if response.status_code != 200:
-            asyncio.create_task(admin_log(f"Error fetching today's opponent: {response.status_code}"))
-            return "Unknown"
-        data = response.json()
-        for date_obj in data.get("dates", []):
-            for game in date_obj.get("games", []):
-                if game.get("gameType") != "R":
-                    continue
-                teams = game.get("teams", {})
-                home_team = teams.get("home", {}).get("team", {})
-                away_team = teams.get("away", {}).get("team", {})
-                
-                if home_team.get("id") == team_id:
-                    opponent_full_name = away_team.get("name", "Unknown")
-                elif away_team.get("id") == team_id:
-                    opponent_full_name = home_team.get("name", "Unknown")
-                else:
-                    continue
+    index = await get_schedule_index()
+    today_games = index.games_on(team_id, today, game_type="R")
+    if today_games:
+        return team_nickname(today_games[0].opponent(team_id)[1])
+    await admin_log("No regular season game found for today when fetching opponent.")
+    return "Unknown"
 
-                # Check if for multi-word teams in opponent team name
-                for indicator in multi_word_teams:
-                    if indicator in opponent_full_name:
-                        return indicator
-                # Otherwise, return the last token (nickname)
-                return opponent_full_name.split()[-1]
-        asyncio.create_task(admin_log("No regular season game found for today when fetching opponent."))
-        return "Unknown"
+async def get_today_opponent(team_id):
+    """
+    Same as find_today_opponent, but returns "Unknown" if the schedule can't be fetched.
+    """
+    try:
+        return await find_today_opponent(team_id)
     except Exception as e:
-        asyncio.create_task(admin_log(f"Exception in get_today_opponent: {e}"))
+        await admin_log(f"Exception in get_today_opponent: {e}")
         return "Unknown"
     
-def get_recent_games(team_id, days_delta=60, max_games=10):
+async def get_recent_games(team_id, days_delta=SCHEDULE_PAST_DAYS, max_games=10):
     """
     Retrieve the team's most recent completed games over the past `days_delta` days.
     Returns at most `max_games` games.
     """
     today = datetime.date.today()
     start_date = today - datetime.timedelta(days=days_delta)
-    start_date_str = start_date.strftime("%Y-%m-%d")
-    end_date_str = today.strftime("%Y-%m-%d")
-    
-    schedule_url = f"{BASE_URL}/v1/schedule?teamId={team_id}&sportId=1&startDate={start_date_str}&endDate={end_date_str}"
-    response = requests.get(schedule_url)
-    if response.status_code != 200:
-        raise Exception("Error fetching schedule data")
-    
-    data = response.json()
-    games = []
-    for date_obj in data.get("dates", []):
-        for game in date_obj.get("games", []):
-            if game.get("status", {}).get("abstractGameState") == "Final":
-                games.append(game)
+    index = await get_schedule_index()
+    if index.covers(start_date):
+        candidates = index.games_between(start_date, today, team_id)
+    else:
+        # Windows reaching into a previous season fall outside the shared schedule index.
+        schedule_url = f"{BASE_URL}/v1/schedule?teamId={team_id}&sportId=1&startDate={start_date.strftime('%Y-%m-%d')}&endDate={today.strftime('%Y-%m-%d')}"
+        data = await fetch_json(schedule_url, shared_ttl=SCHEDULE_TTL_SECONDS)
+        if data is None:
+            raise Exception("Error fetching schedule data")
+        candidates = parse_schedule_games(data)
+    # Postponed games are reported as Final too, under the gamePk of their makeup game.
+    games = [game for game in candidates if game.is_final and not game.is_postponed]
     
-    games.sort(key=lambda g: g.get("gameDate"), reverse=True)
+    games.sort(key=lambda g: g.game_date, reverse=True)
     return games[:max_games]
 
-def get_boxscore(game_pk):
+boxscore_requests = {}
+
+async def get_boxscore(game_pk, final=False):
     """
-    Retrieves the boxscore data via the /feed/live endpoint for a specific game.
-    The live feed JSON contains boxscore info under "liveData" -> "boxscore".
+    Retrieves the batting lines for a specific game from the /boxscore endpoint.
+    The request is filtered with `fields=` so only the team ids and player batting
+    stats are downloaded and decoded. Pass `final=True` for games whose
+    abstractGameState is "Final"; those are stored in the on-disk cache and later
+    calls are served without a network request. Concurrent calls for the same game,
+    e.g. when two followed teams play each other, share a single request.
     """
-    url = f"{BASE_URL}/v1.1/game/{game_pk}/feed/live"
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching live feed for game {game_pk}")
-    
-    data = response.json()
-    boxscore = data.get("liveData", {}).get("boxscore")
-    if not boxscore:
-        raise Exception("No boxscore data found in the live feed.")
+    cached = load_cached_boxscore(game_pk)
+    if cached is not None:
+        return cached
+
+    request = boxscore_requests.get(game_pk)
+    if request is None:
+        request = asyncio.ensure_future(download_boxscore(game_pk, final))
+        boxscore_requests[game_pk] = request
+        request.add_done_callback(lambda _: boxscore_requests.pop(game_pk, None))
+    return await asyncio.shield(request)
+
+async def download_boxscore(game_pk, final, store=True):
+    url = f"{BASE_URL}/v1/game/{game_pk}/boxscore"
+    shared_ttl = SHARED_FINAL_BOXSCORE_TTL_SECONDS if final else SHARED_LIVE_BOXSCORE_TTL_SECONDS
+    boxscore = await fetch_json(url, params={"fields": BOXSCORE_FIELDS}, shared_ttl=shared_ttl)
+    if boxscore is None:
+        raise Exception(f"Error fetching boxscore for game {game_pk}")
+    if not boxscore.get("teams"):
+        raise Exception(f"No boxscore data found for game {game_pk}.")
+    boxscore = slim_boxscore(boxscore)
+
+    if final and store:
+        store_cached_boxscore(game_pk, boxscore)
     return boxscore
 
-def aggregate_player_stats(games, team_id):
+async def fetch_boxscores(games, concurrency=BOXSCORE_CONCURRENCY, store=True):
     """
-    For each game in `games`, fetch the Dodgers’ boxscore and accumulate batting stats.
-    Returns a dictionary keyed by player id.
+    Fetches the boxscores for `games` concurrently, with at most `concurrency`
+    requests in flight. Returns a list in the same order as `games`; a failed
+    fetch is returned as its exception instead of cancelling the others.
+    With `store=False` games missing from the boxscore cache are downloaded
+    without being added to it, for bulk jobs that would evict the recent games.
     """
-    aggregated_stats = {}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(game):
+        async with semaphore:
+            if store:
+                return await get_boxscore(game.game_pk, final=game.is_final)
+            cached = load_cached_boxscore(game.game_pk)
+            if cached is not None:
+                return cached
+            return await download_boxscore(game.game_pk, game.is_final, store=False)
+
+    with metrics.timer("step_seconds", step="fetch_boxscores"):
+        return await asyncio.gather(
+            *(fetch(game) for game in games),
+            return_exceptions=True,
+        )
+
+def team_batting_lines(boxscore, team_id):
+    """
+    Extracts the BattingLine of every player on `team_id` from a boxscore.
+    Returns a dictionary keyed by player id, or None if the team did not play in the game.
+    """
+    teams_data = boxscore.get("teams", {})
+    if teams_data.get("home", {}).get("team", {}).get("id") == team_id:
+        team_box = teams_data.get("home")
+    elif teams_data.get("away", {}).get("team", {}).get("id") == team_id:
+        team_box = teams_data.get("away")
+    else:
+        return None
     
-    for game in games:
-        game_pk = game.get("gamePk")
-        try:
-            boxscore = get_boxscore(game_pk)
-        except Exception as e:
-            asyncio.create_task(admin_log(str(e)))
+    lines = {}
+    players = team_box.get("players", {})
+    for player_key, player_info in players.items():
+        batting_stats = player_info.get("stats", {}).get("batting")
+        if not batting_stats:
+            continue  # skip if no batting stats
+        
+        pid = player_info.get("person", {}).get("id")
+        pname = player_info.get("person", {}).get("fullName", "Unknown")
+        if pid is None:
             continue
         
-        teams_data = boxscore.get("teams", {})
-        if teams_data.get("home", {}).get("team", {}).get("id") == team_id:
-            team_box = teams_data.get("home")
-        elif teams_data.get("away", {}).get("team", {}).get("id") == team_id:
-            team_box = teams_data.get("away")
-        else:
+        lines[pid] = BattingLine.from_api(pname, batting_stats)
+    return lines
+
+def extract_batting_lines(boxscores, team_id):
+    """
+    team_batting_lines for each boxscore, in order.
+    """
+    return [team_batting_lines(boxscore, team_id) for boxscore in boxscores]
+
+def merge_batting_lines(boxscores, team_id):
+    """
+    Sums the team's batting lines over `boxscores` into BattingLines keyed by player id.
+    """
+    aggregated_stats = {}
+    for boxscore in boxscores:
+        lines = team_batting_lines(boxscore, team_id)
+        if lines is None:
             continue
         
-        players = team_box.get("players", {})
-        for player_key, player_info in players.items():
-            batting_stats = player_info.get("stats", {}).get("batting")
-            if not batting_stats:
-                continue  # skip if no batting stats
-            
-            at_bats = int(batting_stats.get("atBats", 0))
-            hits = int(batting_stats.get("hits", 0))
-            home_runs = int(batting_stats.get("homeRuns", 0))
-            # Extract RBI values
-            rbi = int(batting_stats.get("rbi", 0))
-            
-            pid = player_info.get("person", {}).get("id")
-            pname = player_info.get("person", {}).get("fullName", "Unknown")
-            if pid is None:
-                continue
-            
+        for pid, line in lines.items():
             if pid not in aggregated_stats:
-                aggregated_stats[pid] = {
-                    "name": pname,
-                    "atBats": 0,
-                    "hits": 0,
-                    "homeRuns": 0,
-                    "rbi": 0
-                }
-            
-            aggregated_stats[pid]["atBats"] += at_bats
-            aggregated_stats[pid]["hits"] += hits
-            aggregated_stats[pid]["homeRuns"] += home_runs
-            aggregated_stats[pid]["rbi"] += rbi
-    
+                aggregated_stats[pid] = BattingLine(line.name)
+            aggregated_stats[pid].add(line)
     return aggregated_stats
 
+async def aggregate_player_stats(games, team_id, concurrency=BOXSCORE_CONCURRENCY):
+    """
+    For each game in `games`, fetch the Dodgers’ boxscore and accumulate batting stats.
+    Boxscores are fetched concurrently but merged in the order of `games`.
+    Returns a dictionary keyed by player id.
+    """
+    boxscores = await fetch_boxscores(games, concurrency)
+    
+    errors = [boxscore for boxscore in boxscores if isinstance(boxscore, Exception)]
+    for error in errors:
+        await admin_log(str(error))
+    
+    with metrics.timer("step_seconds", step="aggregate_player_stats"):
+        fetched = [boxscore for boxscore in boxscores if not isinstance(boxscore, Exception)]
+        return await run_in_worker(merge_batting_lines, fetched, team_id)
+
+class RollingBattingWindow:
+    """
+    Batting totals over a team's last `size` completed games.
+    Keeps each game's batting lines plus per-player running totals, so adding a
+    new game and dropping the oldest costs O(players) rather than re-aggregating
+    every game in the window.
+    """
+    def __init__(self, team_id, size):
+        self.team_id = team_id
+        self.size = size
+        self.games = collections.deque()  # (game_pk, lines), oldest first
+        self.totals = {}
+        self.appearances = {}
+        self.lock = asyncio.Lock()
+
+    def game_pks(self):
+        return [game_pk for game_pk, _ in self.games]
+
+    def clear(self):
+        self.games.clear()
+        self.totals.clear()
+        self.appearances.clear()
+
+    def add_game(self, game_pk, lines):
+        self.games.append((game_pk, lines))
+        for pid, line in lines.items():
+            if pid not in self.totals:
+                self.totals[pid] = BattingLine(line.name)
+                self.appearances[pid] = 0
+            self.totals[pid].add(line)
+            self.appearances[pid] += 1
+        while len(self.games) > self.size:
+            self.drop_oldest()
+
+    def drop_oldest(self):
+        _, lines = self.games.popleft()
+        for pid, line in lines.items():
+            self.totals[pid].subtract(line)
+            self.appearances[pid] -= 1
+            if self.appearances[pid] == 0:
+                del self.totals[pid]
+                del self.appearances[pid]
+
+    async def sync(self, games):
+        """
+        Brings the window in line with `games` (most recent first, as returned by
+        get_recent_games). Only games not already in the window are fetched; if the
+        window no longer lines up with `games` it is rebuilt from scratch.
+        """
+        async with self.lock:
+            target = [game.game_pk for game in reversed(games)]
+            current = self.game_pks()
+            new_games = [game for game in reversed(games) if game.game_pk not in current]
+            combined = current + [game.game_pk for game in new_games]
+            if combined[len(combined) - len(target):] != target:
+                self.clear()
+                new_games = list(reversed(games))
+
+            boxscores = await fetch_boxscores(new_games)
+            for boxscore in boxscores:
+                if isinstance(boxscore, Exception):
+                    await admin_log(str(boxscore))
+            with metrics.timer("step_seconds", step="rolling_window_update"):
+                fetched = [
+                    (game, boxscore) for game, boxscore in zip(new_games, boxscores)
+                    if not isinstance(boxscore, Exception)
+                ]
+                all_lines = await run_in_worker(
+                    extract_batting_lines, [boxscore for _, boxscore in fetched], self.team_id
+                )
+                for (game, _), lines in zip(fetched, all_lines):
+                    if lines is not None:
+                        self.add_game(game.game_pk, lines)
+                while len(self.games) > len(target):
+                    self.drop_oldest()
+
+    def aggregated_stats(self):
+        """
+        Returns a copy of the running totals in the same shape as aggregate_player_stats.
+        """
+        return {pid: line.copy() for pid, line in self.totals.items()}
+
+batting_windows = collections.OrderedDict()
+
+async def get_rolling_player_stats(team_id, max_games=10):
+    """
+    Returns aggregated batting stats for the team's last `max_games` completed games,
+    updating a long-lived RollingBattingWindow incrementally.
+    """
+    days_delta = max(SCHEDULE_PAST_DAYS, max_games * 2)
+    games = await get_recent_games(team_id, days_delta=days_delta, max_games=max_games)
+    key = (team_id, max_games)
+    window = batting_windows.get(key)
+    if window is None:
+        window = batting_windows[key] = RollingBattingWindow(team_id, max_games)
+        while len(batting_windows) > BATTING_WINDOW_CACHE_ENTRIES:
+            batting_windows.popitem(last=False)
+    batting_windows.move_to_end(key)
+    await window.sync(games)
+    return games, window.aggregated_stats()
+
+# Rate stats that format_batting_stats can rank by, with their table labels
+RATE_STATS = {"avg": "AVG", "obp": "OBP", "slg": "SLG", "ops": "OPS"}
+
 def compute_batting_average(aggregated_stats):
     """
-    Computes batting average (hits/atBats) for each player and filters out those
-    with fewer at-bats than the median at-bats for the team.
-    Returns a list of stat dictionaries.
+    Filters out players with fewer at-bats than the median at-bats for the team.
+    Their batting average, OBP, SLG and OPS are derived by BattingLine.
+    Returns a list of BattingLines.
     """
     players_list = []
     # Get list of atBats values (considering only players that had at least one AB)
-    at_bats_values = [stats["atBats"] for stats in aggregated_stats.values() if stats["atBats"] > 0]
+    at_bats_values = [line.atBats for line in aggregated_stats.values() if line.atBats > 0]
     
     if not at_bats_values:
         return players_list
     
-    at_bats_values.sort()
-    n = len(at_bats_values)
-    if n % 2 == 1:
-        median_at_bats = at_bats_values[n // 2]
-    else:
-        median_at_bats = (at_bats_values[(n // 2) - 1] + at_bats_values[n // 2]) / 2
+    median_at_bats = statistics.median(at_bats_values)
     
-    # Filter players based on the median atBats and compute average
-    for stats in aggregated_stats.values():
-        if stats["atBats"] < median_at_bats:
+    # Filter players based on the median atBats
+    for line in aggregated_stats.values():
+        if line.atBats < median_at_bats:
             continue
-        
-        if stats["atBats"] > 0:
-            avg = stats["hits"] / stats["atBats"]
-        else:
-            avg = 0
-        stats["avg"] = avg
-        players_list.append(stats)
+        players_list.append(line)
     return players_list
 
-def format_batting_stats(players_list, top_n=3):
+def format_batting_stats(players_list, top_n=3, sort_by="avg"):
     """
-    Formats the top N players (by batting average) as a text table.
+    Formats the top N players (by batting average, or by `sort_by`) as a text table.
+    When ranking by another rate stat, that stat is added as the last column.
     """
-    sorted_players = sorted(players_list, key=lambda x: x["avg"], reverse=True)
+    # nlargest only keeps the top N instead of sorting the whole roster.
+    top_players = heapq.nlargest(top_n, players_list, key=lambda x: getattr(x, sort_by))
+    extra_label = RATE_STATS[sort_by] if sort_by != "avg" else None
     lines = []
     header = f"{'Player':20s} {'AVG':>5s} {'HR':>3s} {'RBI':>3s}"
+    if extra_label:
+        header += f" {extra_label:>5s}"
     lines.append(header)
     lines.append("-" * len(header))
-    for player in sorted_players[:top_n]:
-        avg_str = f"{player['avg']:.3f}"
+    for player in top_players:
+        avg_str = f"{player.avg:.3f}"
         # Truncate player name if necessary for compact display
-        line = f"{player['name'][:20]:20s} {avg_str:>5s} {str(player['homeRuns']):>3s} {str(player['rbi']):>3s}"
+        line = f"{player.name[:20]:20s} {avg_str:>5s} {str(player.homeRuns):>3s} {str(player.rbi):>3s}"
+        if extra_label:
+            line += f" {getattr(player, sort_by):>5.3f}"
         lines.append(line)
     return "\n".join(lines)
 
-def get_dodgers_batting_stats():
+async def render_team_batting_stats(team_id, max_games=10, sort_by="avg"):
+    """
+    Combines data fetching and formatting to produce a message of a team's top
+    batters over the last `max_games` completed games, ranked by `sort_by`.
+    Errors fetching the data are raised to the caller.
+    """
+    games, aggregated_stats = await get_rolling_player_stats(team_id, max_games=max_games)
+    if not games:
+        await admin_log("No completed games found in the specified date range.")
+        return "No completed games found in the specified date range."
+    
+    with metrics.timer("step_seconds", step="compute_batting_average"):
+        players_list = await run_in_worker(compute_batting_average, aggregated_stats)
+    if not players_list:
+        await admin_log("No batting stats available from the recent games.")
+        return "No batting stats available from the recent games."
+    
+    with metrics.timer("step_seconds", step="format_batting_stats"):
+        return format_batting_stats(players_list, top_n=3, sort_by=sort_by)
+
+async def cached_team_batting_stats(team_id, max_games=10, sort_by="avg"):
     """
-    Combines data fetching and formatting to produce a message of top batters.
+    render_team_batting_stats behind the result cache: concurrent identical
+    requests share one computation, and the text is reused until it expires or
+    the team completes another game.
+    """
+    version = await latest_final_game_pk(team_id)
+    return await result_cache.get(
+        ("batting", team_id, max_games, sort_by),
+        version,
+        lambda: render_team_batting_stats(team_id, max_games=max_games, sort_by=sort_by),
+    )
+
+async def get_team_batting_stats(team_id, max_games=10, sort_by="avg"):
+    """
+    Same as cached_team_batting_stats, but returns errors as the message text.
     """
     try:
-        games = get_recent_games(TEAM_ID, days_delta=60, max_games=10)
-        if not games:
-            asyncio.create_task(admin_log("No completed games found in the specified date range."))
-            return "No completed games found in the specified date range."
-        
-        aggregated_stats = aggregate_player_stats(games, TEAM_ID)
-        players_list = compute_batting_average(aggregated_stats)
-        if not players_list:
-            asyncio.create_task(admin_log("No batting stats available from the recent games."))
-            return "No batting stats available from the recent games."
-        
-        return format_batting_stats(players_list, top_n=3)
+        return await cached_team_batting_stats(team_id, max_games=max_games, sort_by=sort_by)
     except Exception as e:
         return f"An error occurred while fetching data: {e}"
 
+async def get_dodgers_batting_stats(max_games=10, sort_by="avg"):
+    return await get_team_batting_stats(TEAM_ID, max_games=max_games, sort_by=sort_by)
+
 ####################################
-# NL West Standings
+# Historical Store
 ####################################
+# Schema version of the history tables; tied to BATTING_FIELDS like the boxscore cache.
+HISTORY_SCHEMA_VERSION = BOXSCORE_CACHE_VERSION
+HISTORY_BATCH_SIZE = 50  # Games committed per backfill batch, so an interrupted run keeps its progress
 
-def get_nlwest_standings():
+history_db = None
+
+def get_history_db():
     """
-    Fetches the current standings for the National League West division.
+    Opens the SQLite store of per-game player batting lines, (re)creating the
+    tables when the schema version changed.
+    """
+    global history_db
+    with db_open_lock:
+        if history_db is None:
+            history_dir = os.path.dirname(HISTORY_DB_PATH)
+            if history_dir:
+                os.makedirs(history_dir, exist_ok=True)
+            history_db = sqlite3.connect(HISTORY_DB_PATH, check_same_thread=False)
+            if history_db.execute("PRAGMA user_version").fetchone()[0] != HISTORY_SCHEMA_VERSION:
+                with history_db:
+                    history_db.execute("DROP TABLE IF EXISTS batting_lines")
+                    history_db.execute("DROP TABLE IF EXISTS games")
+                history_db.execute(f"PRAGMA user_version = {HISTORY_SCHEMA_VERSION}")
+            batting_columns = ", ".join(f"{field} INTEGER NOT NULL DEFAULT 0" for field in BATTING_FIELDS)
+            with history_db:
+                history_db.execute(
+                    "CREATE TABLE IF NOT EXISTS games ("
+                    "game_pk INTEGER PRIMARY KEY, season INTEGER NOT NULL, game_date TEXT NOT NULL, "
+                    "home_id INTEGER NOT NULL, away_id INTEGER NOT NULL, "
+                    "home_name TEXT NOT NULL, away_name TEXT NOT NULL)"
+                )
+                history_db.execute(
+                    "CREATE TABLE IF NOT EXISTS batting_lines ("
+                    "game_pk INTEGER NOT NULL, team_id INTEGER NOT NULL, "
+                    f"player_id INTEGER NOT NULL, player_name TEXT NOT NULL, {batting_columns}, "
+                    "PRIMARY KEY (game_pk, team_id, player_id))"
+                )
+                history_db.execute("CREATE INDEX IF NOT EXISTS games_home ON games (home_id, season, game_date)")
+                history_db.execute("CREATE INDEX IF NOT EXISTS games_away ON games (away_id, season, game_date)")
+    return history_db
+
+def store_game_history(game, boxscore):
+    """
+    Stores a completed game and both teams' batting lines in one transaction.
+    """
+    db = get_history_db()
+    rows = []
+    for team_id in game.team_ids:
+        for pid, line in (team_batting_lines(boxscore, team_id) or {}).items():
+            rows.append((game.game_pk, team_id, pid, line.name) + line.counts())
+    placeholders = ", ".join("?" for _ in range(4 + len(BATTING_FIELDS)))
+    with db:
+        db.execute(
+            "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (game.game_pk, int(game.official_date[:4]), game.official_date,
+             game.home_id, game.away_id, game.home_name, game.away_name),
+        )
+        db.executemany(
+            f"INSERT OR REPLACE INTO batting_lines (game_pk, team_id, player_id, player_name, {', '.join(BATTING_FIELDS)}) "
+            f"VALUES ({placeholders})",
+            rows,
+        )
+
+async def backfill_season(season, team_ids=None, concurrency=BOXSCORE_CONCURRENCY):
+    """
+    Loads every completed regular season game of `season` for the followed teams
+    into the historical store. Games already stored are skipped, so the job
+    resumes where an interrupted run stopped and later runs only fetch new games.
+    Returns (stored, failed) game counts.
+    """
+    team_ids = team_ids or FOLLOWED_TEAM_IDS
+    team_ids_str = ",".join(str(team_id) for team_id in team_ids)
+    schedule_url = f"{BASE_URL}/v1/schedule?teamId={team_ids_str}&sportId=1&season={season}&gameType=R"
+    data = await fetch_json(schedule_url)
+    if data is None:
+        raise Exception(f"Error fetching the {season} schedule")
+
+    db = get_history_db()
+    stored_pks = {row[0] for row in db.execute("SELECT game_pk FROM games WHERE season = ?", (season,))}
+    # Postponed games are reported as Final too; their makeup game reuses the
+    # gamePk and is loaded once it has been played.
+    missing = [
+        game for game in parse_schedule_games(data)
+        if game.is_final and not game.is_postponed and game.game_pk not in stored_pks
+    ]
+    # A doubleheader or a game between two followed teams is listed only once, but
+    # guard against duplicates anyway.
+    missing = list({game.game_pk: game for game in missing}.values())
+
+    stored = failed = 0
+    for start in range(0, len(missing), HISTORY_BATCH_SIZE):
+        batch = missing[start:start + HISTORY_BATCH_SIZE]
+        # Bypass the boxscore cache: a season of games would evict the recent ones !avg uses.
+        boxscores = await fetch_boxscores(batch, concurrency, store=False)
+        for game, boxscore in zip(batch, boxscores):
+            if isinstance(boxscore, Exception):
+                failed += 1
+                continue
+            store_game_history(game, boxscore)
+            stored += 1
+    return stored, failed
+
+def query_batting_history(team_id, season, last_n=None, opponent_id=None, home=None):
+    """
+    Aggregates a team's batting lines from the historical store with optional
+    filters: the last `last_n` games, games against `opponent_id`, and home
+    (True) or away (False) games. Returns (games_matched, aggregated_stats) with
+    aggregated_stats in the same shape as aggregate_player_stats.
+    """
+    if home is True:
+        conditions, params = ["home_id = ?"], [team_id]
+    elif home is False:
+        conditions, params = ["away_id = ?"], [team_id]
+    else:
+        conditions, params = ["(home_id = ? OR away_id = ?)"], [team_id, team_id]
+    conditions.append("season = ?")
+    params.append(season)
+    if opponent_id is not None:
+        conditions.append("(home_id = ? OR away_id = ?)")
+        params += [opponent_id, opponent_id]
+    game_query = f"SELECT game_pk FROM games WHERE {' AND '.join(conditions)} ORDER BY game_date DESC, game_pk DESC"
+    if last_n:
+        game_query += " LIMIT ?"
+        params.append(last_n)
+
+    db = get_history_db()
+    game_pks = [row[0] for row in db.execute(game_query, params)]
+    if not game_pks:
+        return 0, {}
+    sums = ", ".join(f"SUM({field})" for field in BATTING_FIELDS)
+    rows = db.execute(
+        f"SELECT player_id, MAX(player_name), {sums} FROM batting_lines "
+        f"WHERE team_id = ? AND game_pk IN ({', '.join('?' for _ in game_pks)}) GROUP BY player_id",
+        [team_id] + game_pks,
+    )
+    aggregated_stats = {row[0]: BattingLine(row[1], *row[2:]) for row in rows}
+    return len(game_pks), aggregated_stats
+
+def find_opponent_id(name, season):
+    """
+    Resolves a team name or nickname (e.g. "Giants", "Red Sox") from the stored games.
+    """
+    db = get_history_db()
+    pattern = f"%{name}%"
+    row = db.execute(
+        "SELECT home_id FROM games WHERE season = ? AND home_name LIKE ? "
+        "UNION SELECT away_id FROM games WHERE season = ? AND away_name LIKE ? LIMIT 1",
+        (season, pattern, season, pattern),
+    ).fetchone()
+    return row[0] if row else None
+
+####################################
+# Division Standings
+####################################
+standings_records = None
+standings_fetched_at = 0.0
+standings_lock = asyncio.Lock()
+
+async def get_standings_records():
+    """
+    Returns the regular season TeamRecords of every division in standings order,
+    keyed by division id. Both leagues come from one request that is shared by all
+    divisions and reused for STANDINGS_TTL_SECONDS.
+    """
+    global standings_records, standings_fetched_at
+    async with standings_lock:
+        if standings_records is not None and time.monotonic() - standings_fetched_at < STANDINGS_TTL_SECONDS:
+            metrics.inc("cache_hits_total", cache="standings")
+            return standings_records
+        metrics.inc("cache_misses_total", cache="standings")
+
+        url = f"{BASE_URL}/v1/standings?leagueId=103,104&standingsTypes=regularSeason"
+        data = await fetch_json(url, shared_ttl=STANDINGS_TTL_SECONDS)
+        if data is None:
+            raise Exception("Error fetching standings data.")
+        standings_records = {
+            record.get("division", {}).get("id"): [
+                TeamRecord.from_api(team_record) for team_record in record.get("teamRecords", [])
+            ]
+            for record in data.get("records", [])
+        }
+        standings_fetched_at = time.monotonic()
+        return standings_records
+
+async def get_team_division_id(team_id):
+    """
+    Looks up which division `team_id` plays in from the shared standings records.
+    Returns None if the team is not found.
+    """
+    records = await get_standings_records()
+    for division_id, team_records in records.items():
+        for team_record in team_records:
+            if team_record.team_id == team_id:
+                return division_id
+    return None
+
+async def cached_division_standings(division_id):
+    """
+    render_division_standings behind the result cache: the text is shared until
+    it expires or a followed team completes another game. Errors fetching the
+    standings are raised to the caller.
+    """
+    try:
+        version = await latest_final_game_pk()
+    except Exception:
+        version = None  # Standings do not depend on the schedule; rely on the TTL alone.
+    return await result_cache.get(
+        ("standings", division_id),
+        version,
+        lambda: render_division_standings(division_id),
+    )
+
+async def get_division_standings(division_id):
+    """
+    Fetches the current standings for a division.
     Returns a formatted string displaying team name, wins, losses, win percentage, and games behind.
+    Same as cached_division_standings, but returns errors as the message text.
     """
-    url = f"{BASE_URL}/v1/standings?leagueId=104&standingsTypes=regularSeason"
-    response = requests.get(url)
-    if response.status_code != 200:
-        return "Error fetching standings data."
-    data = response.json()
-    records = data.get("records", [])
-    nlwest_record = None
-
-    # Check for division id 203 in the standings records.
-    for record in records:
-        division = record.get("division", {})
-        if division.get("id") == 203:
-            nlwest_record = record
-            break
+    try:
+        return await cached_division_standings(division_id)
+    except Exception as e:
+        return str(e)
+
+async def render_division_standings(division_id):
+    """
+    Formats the standings table for a division. Errors fetching the standings
+    are raised to the caller.
+    """
+    records = await get_standings_records()
+    team_records = records.get(division_id)
 
-    if nlwest_record is None:
-        return "National League West standings not found."
+    if team_records is None:
+        return f"{DIVISION_NAMES.get(division_id, 'Division')} standings not found."
     
     lines = []
     header = f"{'Team':13s} {'W':>3s} {'L':>3s} {'Pct':>5s} {'GB':>3s}"
     lines.append(header)
     lines.append("-" * len(header))
-    for teamRec in nlwest_record.get("teamRecords", []):
-        team_name = teamRec.get("team", {}).get("name", "Unknown")
-        # Extract just the nickname by using the last word.
-        team_nickname = team_name.split()[-1]
-        wins = teamRec.get("wins", 0)
-        losses = teamRec.get("losses", 0)
-        win_pct = teamRec.get("winningPercentage", "N/A")
-        games_back = teamRec.get("gamesBack", "0")
-        line = f"{team_nickname:13s} {str(wins):>3s} {str(losses):>3s} {win_pct:>5s} {str(games_back):>3s}"
+    for team_record in team_records:
+        line = (
+            f"{team_nickname(team_record.name):13s} {str(team_record.wins):>3s} {str(team_record.losses):>3s} "
+            f"{team_record.winning_percentage:>5s} {str(team_record.games_back):>3s}"
+        )
         lines.append(line)
     return "\n".join(lines)
 
+async def get_nlwest_standings():
+    """
+    Fetches the current standings for the National League West division.
+    """
+    return await get_division_standings(NL_WEST_DIVISION_ID)
+
+####################################
+# Live Game Updates
+####################################
+# `fields=` filter for the live feed so each poll only carries the game state,
+# team names, scoring plays and the server's suggested polling wait.
+LIVE_FEED_FIELDS = ",".join((
+    "metaData", "wait",
+    "gameData", "status", "abstractGameState", "detailedState", "teams", "away", "home", "name", "id",
+    "liveData", "linescore", "runs",
+    "plays", "scoringPlays", "allPlays", "result", "description", "awayScore", "homeScore",
+    "about", "halfInning", "inning",
+))
+
+class LiveGameTracker:
+    """
+    Polling state for one game followed in live mode: the last response
+    validators, the scoring plays already posted, and the game state that picks
+    the next polling interval.
+    """
+    def __init__(self, game_pk, start_time=None):
+        self.game_pk = game_pk
+        self.start_time = start_time
+        self.validators = {}
+        self.seen_plays = None
+        self.state = "Preview"
+        self.detailed_state = ""
+        self.server_wait = None
+        self.finished = False
+
+    def next_poll_seconds(self):
+        if self.state == "Live":
+            if "Delay" in self.detailed_state or "Suspended" in self.detailed_state:
+                return LIVE_DELAY_SECONDS
+            # Never poll faster than the API's own suggested wait.
+            return max(LIVE_IN_PROGRESS_SECONDS, self.server_wait or 0)
+        return LIVE_PREGAME_SECONDS
+
+    def seconds_until_pregame(self, now):
+        """
+        Seconds until polling should start, LIVE_PREGAME_LEAD_MINUTES before first
+        pitch. Zero once the game has started or when its start time is unknown.
+        """
+        if self.state != "Preview" or self.start_time is None:
+            return 0
+        lead = datetime.timedelta(minutes=LIVE_PREGAME_LEAD_MINUTES)
+        return max(0, (self.start_time - lead - now).total_seconds())
+
+async def poll_live_game(tracker):
+    """
+    Polls the filtered live feed of a game with a conditional request and returns
+    the messages to post: new scoring plays, then the final score once the game
+    ends. Returns an empty list when nothing changed since the previous poll.
+    The first poll only records plays that already happened, so a restart in the
+    middle of a game does not repost them.
+    """
+    url = f"{BASE_URL}/v1.1/game/{tracker.game_pk}/feed/live"
+    data, tracker.validators = await fetch_json_if_changed(
+        url, params={"fields": LIVE_FEED_FIELDS}, validators=tracker.validators
+    )
+    if data is None:
+        return []
+
+    status = data.get("gameData", {}).get("status", {})
+    tracker.state = status.get("abstractGameState", tracker.state)
+    tracker.detailed_state = status.get("detailedState", "")
+    tracker.server_wait = data.get("metaData", {}).get("wait")
+
+    teams = data.get("gameData", {}).get("teams", {})
+    away_name = team_nickname(teams.get("away", {}).get("name", "Away"))
+    home_name = team_nickname(teams.get("home", {}).get("name", "Home"))
+    plays = data.get("liveData", {}).get("plays", {})
+    all_plays = plays.get("allPlays", [])
+    scoring_plays = [idx for idx in plays.get("scoringPlays", []) if idx < len(all_plays)]
+
+    first_poll = tracker.seen_plays is None
+    if first_poll:
+        tracker.seen_plays = set(scoring_plays)
+
+    messages = []
+    for idx in scoring_plays:
+        if idx in tracker.seen_plays:
+            continue
+        tracker.seen_plays.add(idx)
+        play = all_plays[idx]
+        result = play.get("result", {})
+        about = play.get("about", {})
+        half = "Top" if about.get("halfInning") == "top" else "Bot"
+        messages.append(
+            f"{half} {about.get('inning', '?')}: {result.get('description', 'Scoring play')} "
+            f"({away_name} {result.get('awayScore', 0)}, {home_name} {result.get('homeScore', 0)})"
+        )
+
+    if tracker.state == "Final":
+        tracker.finished = True
+        if not first_poll:
+            runs = data.get("liveData", {}).get("linescore", {}).get("teams", {})
+            away_runs = runs.get("away", {}).get("runs", 0)
+            home_runs = runs.get("home", {}).get("runs", 0)
+            messages.append(f"Final: {away_name} {away_runs}, {home_name} {home_runs}")
+    return messages
+
+####################################
+# Discord Delivery
+####################################
+# Every outgoing message waits for a token from its channel's bucket and from a
+# global one, so fanning out to many channels is paced under Discord's limits
+# (5 messages per 5 seconds per channel, 50 requests per second overall)
+# instead of running into 429s.
+channel_send_buckets = {}
+global_send_bucket = TokenBucket(DISCORD_GLOBAL_SENDS_PER_SECOND, DISCORD_GLOBAL_SENDS_PER_SECOND)
+
+def split_message(text, limit=DISCORD_MESSAGE_LIMIT):
+    """
+    Splits `text` into messages of at most `limit` characters, breaking between
+    lines. A code block cut across messages is closed and reopened so every
+    part still renders as a table.
+    """
+    room = limit - 4  # space to close a code block at the end of a part
+    piece = room - 4  # space to reopen one at the start of the next
+    lines = []
+    for line in text.split("\n"):
+        # Lines too long for a message on their own are cut into pieces.
+        lines.extend([line[i:i + piece] for i in range(0, len(line), piece)] or [""])
+
+    parts = []
+    current = None
+    in_code = False  # whether the lines so far leave a code block open
+    for line in lines:
+        if current is not None and len(current) + 1 + len(line) > room:
+            parts.append(current + "\n```" if in_code else current)
+            current = "```\n" + line if in_code else line
+        else:
+            current = line if current is None else f"{current}\n{line}"
+        if line.count("```") % 2:
+            in_code = not in_code
+    if current:
+        parts.append(current)
+    return parts
+
+async def send_message(destination, content=None, file=None):
+    """
+    Sends `content` to a channel or command context, split into as many messages
+    as Discord's length limit requires, with `file` attached to the last one.
+    Each message is paced by the channel and global send buckets.
+    """
+    channel = getattr(destination, "channel", destination)
+    bucket = channel_send_buckets.get(channel.id)
+    if bucket is None:
+        bucket = channel_send_buckets[channel.id] = TokenBucket(
+            DISCORD_CHANNEL_SENDS_PER_SECOND, DISCORD_CHANNEL_SEND_BURST
+        )
+    parts = split_message(content) if content else [None]
+    for i, part in enumerate(parts):
+        await bucket.acquire()
+        await global_send_bucket.acquire()
+        if file is not None and i == len(parts) - 1:
+            await destination.send(part, file=file)
+        else:
+            await destination.send(part)
+        metrics.inc("discord_messages_total")
+
+# Rendered table images keyed by the table text, most recently used last
+table_images = collections.OrderedDict()
+
+def render_table_image(table):
+    """
+    Draws a text table on a PNG image with Pillow and returns the PNG bytes, or
+    None if Pillow is not installed.
+    """
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:
+        return None
+    try:
+        font = ImageFont.truetype("DejaVuSansMono.ttf", 16)
+    except OSError:
+        font = ImageFont.load_default()  # Pillow's built-in font
+    padding = 12
+    measure = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    left, top, right, bottom = measure.multiline_textbbox((0, 0), table, font=font)
+    image = Image.new("RGB", (right - left + 2 * padding, bottom - top + 2 * padding), (47, 49, 54))
+    ImageDraw.Draw(image).multiline_text((padding - left, padding - top), table, font=font, fill=(220, 221, 222))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+async def get_table_image(table):
+    if table in table_images:
+        table_images.move_to_end(table)
+        metrics.inc("cache_hits_total", cache="table_image")
+        return table_images[table]
+    metrics.inc("cache_misses_total", cache="table_image")
+    with metrics.timer("step_seconds", step="render_table_image"):
+        image = await run_in_worker(render_table_image, table)
+    if image is not None:
+        table_images[table] = image
+        while len(table_images) > TABLE_IMAGE_CACHE_ENTRIES:
+            table_images.popitem(last=False)
+    return image
+
+async def send_table(destination, intro, table):
+    """
+    Sends `intro` followed by a text table: as an image when TABLE_IMAGES is on
+    and Pillow is available, otherwise as a code block.
+    """
+    if TABLE_IMAGES:
+        image = await get_table_image(table)
+        if image is not None:
+            await send_message(destination, intro, file=discord.File(io.BytesIO(image), filename="table.png"))
+            return
+    await send_message(destination, f"{intro}\n```{table}```" if intro else f"```{table}```")
+
+# Admin log lines waiting for the next digest
+admin_log_pending = []
+
+def build_admin_digest(lines):
+    """
+    Joins pending admin log lines into one message, collapsing repeats into a count.
+    """
+    counts = collections.Counter(lines)
+    return "\n".join(line if count == 1 else f"{line} (x{count})" for line, count in counts.items())
+
+async def flush_admin_log():
+    if not admin_log_pending:
+        return
+    lines = admin_log_pending[:]
+    admin_log_pending.clear()
+    await notify_admin_channel(build_admin_digest(lines))
+
+@tasks.loop(seconds=ADMIN_DIGEST_SECONDS)
+async def admin_digest():
+    """
+    Posts the admin log lines collected since the last run as a single digest,
+    rather than one message per line.
+    """
+    await flush_admin_log()
+
 ####################################
 # Discord Bot Setup
 ####################################
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix=BOT_PREFIX, intents=intents)
+
+class DodgerBot(commands.AutoShardedBot):
+    metrics_runner = None
+
+    async def setup_hook(self):
+        if METRICS_PORT:
+            await self.start_metrics_server()
+
+    async def start_metrics_server(self):
+        """
+        Serves the Prometheus-style metrics at http://METRICS_HOST:METRICS_PORT/metrics.
+        """
+        # aiohttp's server side is only needed when metrics are enabled.
+        from aiohttp import web
+
+        async def handle_metrics(request):
+            return web.Response(text=metrics.render_prometheus(), content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle_metrics)
+        self.metrics_runner = web.AppRunner(app)
+        await self.metrics_runner.setup()
+        await web.TCPSite(self.metrics_runner, METRICS_HOST, METRICS_PORT).start()
+
+    async def close(self):
+        # Release the pooled MLB API connections before the gateway shuts down.
+        await close_http_session()
+        shutdown_worker_executor()
+        # Post whatever is left of the admin log before the gateway goes away.
+        await flush_admin_log()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        await super().close()
+
+bot = DodgerBot(command_prefix=BOT_PREFIX, intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.command_started_at = time.perf_counter()
+
+@bot.after_invoke
+async def record_command_timer(ctx):
+    elapsed = time.perf_counter() - ctx.command_started_at
+    metrics.observe("command_seconds", elapsed, command=ctx.command.qualified_name)
+
+@bot.listen("on_command_error")
+async def count_command_error(ctx, error):
+    command = ctx.command.qualified_name if ctx.command else "unknown"
+    metrics.inc("command_errors_total", command=command, error=type(error).__name__)
+
+def team_for_channel(channel_id):
+    """
+    Returns the team followed in a channel, defaulting to the Dodgers.
+    """
+    return CHANNEL_TEAMS.get(channel_id, TEAM_ID)
+
+startup_task = None
+
+async def warm_caches():
+    """
+    Opens the SQLite stores in a worker thread and loads the schedule and standings
+    in the background after login, so the first commands are served from memory
+    without delaying on_ready. The history backfill starts once this is done.
+    """
+    start = time.perf_counter()
+    stores = [get_boxscore_cache, get_job_store]
+    if HISTORY_BACKFILL:
+        stores.append(get_history_db)
+    try:
+        await asyncio.gather(*(asyncio.to_thread(store) for store in stores))
+        await get_schedule_index()
+        await get_standings_records()
+    except Exception as e:
+        await admin_log(f":warning: [startup] cache warm-up failed: {e}")
+    elapsed = time.perf_counter() - start
+    metrics.observe("startup_seconds", elapsed, phase="warm")
+    print(f"[startup] caches warmed in {elapsed:.2f}s")
+    if HISTORY_BACKFILL:
+        # The daily loop first fires overnight; catch up on this season right away.
+        await history_backfill()
 
 # --- Discord Bot Events and Commands ---
 @bot.event
 async def on_ready():
+    global startup_task
+    # on_ready fires again after every gateway reconnect; warm up only once.
+    if startup_task is None:
+        ready_seconds = time.perf_counter() - STARTED_AT
+        metrics.observe("startup_seconds", ready_seconds, phase="ready")
+        print(f"[startup] ready in {ready_seconds:.2f}s")
+        startup_task = asyncio.create_task(warm_caches())
     await admin_log(f":white_check_mark: Dodger Bot is live! Logged in as {bot.user.name} ({bot.user.id})")
-    if not scheduled_stats.is_running():
-        scheduled_stats.start()
+    if not admin_digest.is_running():
+        admin_digest.start()
+    if not scheduled_jobs.is_running():
+        scheduled_jobs.start()
+    if LIVE_MODE and not live_updates.is_running():
+        live_updates.start()
+    if HISTORY_BACKFILL and not history_backfill.is_running():
+        history_backfill.start()
 
 @bot.command(name="ping")
 async def ping(ctx):
     await ctx.send("Pong!")
 
+@bot.command(name="stats_debug")
+async def stats_debug(ctx):
+    """
+    Admin-only summary of API latency, cache hit rates, errors and command timings.
+    """
+    if ctx.channel.id != ADMIN_CHANNEL_ID:
+        return
+    await send_message(ctx, f"```{metrics.summary()}```")
+
 # --- Test commands for each function ---
 @bot.command(name="avg")
-async def avg(ctx):
-    stats_message = get_dodgers_batting_stats()
-    await ctx.send(f"```{stats_message}```")
+async def avg(ctx, games: int = 10, stat: str = "avg"):
+    games = max(1, min(games, 162))
+    stat = stat.lower()
+    if stat not in RATE_STATS:
+        await ctx.send(f"Unknown stat '{stat}'. Choose from: {', '.join(RATE_STATS)}")
+        return
+    team_id = team_for_channel(ctx.channel.id)
+    stats_message = await get_team_batting_stats(team_id, max_games=games, sort_by=stat)
+    await send_table(ctx, None, stats_message)
+
+@bot.command(name="history")
+async def history(ctx, *filters):
+    """
+    Top batters from the historical store, e.g. `!history last 30`,
+    `!history vs Giants`, `!history home ops` or `!history 2025 away`.
+    """
+    team_id = team_for_channel(ctx.channel.id)
+    season = datetime.date.today().year
+    last_n = None
+    home = None
+    sort_by = "avg"
+    opponent_name = None
+    tokens = [token.lower() for token in filters]
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "vs" and i + 1 < len(tokens):
+            opponent_name = " ".join(filters[i + 1:])
+            break
+        if token.isdigit():
+            if int(token) > 1900:
+                season = int(token)
+            else:
+                last_n = int(token)
+        elif token in ("home", "away"):
+            home = token == "home"
+        elif token in RATE_STATS:
+            sort_by = token
+        i += 1
+
+    opponent_id = None
+    if opponent_name:
+        opponent_id = find_opponent_id(opponent_name, season)
+        if opponent_id is None:
+            await ctx.send(f"No {season} games found against '{opponent_name}'.")
+            return
+
+    with metrics.timer("step_seconds", step="query_batting_history"):
+        games_matched, aggregated_stats = query_batting_history(team_id, season, last_n, opponent_id, home)
+    players_list = compute_batting_average(aggregated_stats)
+    if not players_list:
+        await ctx.send(f"No stored {season} games match those filters.")
+        return
+    description = " ".join(filters) or f"{season} season"
+    table = format_batting_stats(players_list, top_n=3, sort_by=sort_by)
+    await send_table(ctx, f"Top bats ({description}, {games_matched} games):", table)
+
+@bot.command(name="backfill")
+async def backfill(ctx, season: int = None):
+    """
+    Admin-only: loads a whole season into the historical store, e.g. `!backfill 2024`.
+    """
+    if ctx.channel.id != ADMIN_CHANNEL_ID:
+        return
+    season = season or datetime.date.today().year
+    await ctx.send(f"Backfilling {season}...")
+    try:
+        stored, failed = await backfill_season(season)
+    except Exception as e:
+        await ctx.send(f"Error: {e}")
+        return
+    await ctx.send(f"Stored {stored} games from {season} ({failed} failed).")
 
 @bot.command(name="standings")
 async def standings(ctx):
-    standings_message = get_nlwest_standings()
-    await ctx.send(f"```{standings_message}```")
+    try:
+        division_id = await get_team_division_id(team_for_channel(ctx.channel.id))
+    except Exception as e:
+        await ctx.send(f"Error: {e}")
+        return
+    standings_message = await get_division_standings(division_id)
+    await send_table(ctx, None, standings_message)
 
 @bot.command(name="is_new_series_today")
 async def cmd_is_new_series_today(ctx):
-    result = is_new_series_today(TEAM_ID)
+    result = await is_new_series_today(team_for_channel(ctx.channel.id))
     await ctx.send(f"is_new_series_today: {result}")
 
 @bot.command(name="upcoming_regular_season_game_exists")
 async def cmd_upcoming_regular_season_game_exists(ctx):
-    result = upcoming_regular_season_game_exists(TEAM_ID)
+    result = await upcoming_regular_season_game_exists(team_for_channel(ctx.channel.id))
     await ctx.send(f"upcoming_regular_season_game_exists: {result}")
 
 @bot.command(name="get_today_opponent")
 async def cmd_get_today_opponent(ctx):
-    result = get_today_opponent(TEAM_ID)
+    result = await get_today_opponent(team_for_channel(ctx.channel.id))
     await ctx.send(f"get_today_opponent: {result}")
 
 @bot.command(name="get_recent_games")
 async def cmd_get_recent_games(ctx):
     try:
-        games = get_recent_games(TEAM_ID)
-        msg = f"Found {len(games)} recent games. First gamePk: {games[0]['gamePk'] if games else 'N/A'}"
+        games = await get_recent_games(team_for_channel(ctx.channel.id))
+        msg = f"Found {len(games)} recent games. First gamePk: {games[0].game_pk if games else 'N/A'}"
     except Exception as e:
         msg = f"Error: {e}"
     await ctx.send(msg)
 
 @bot.command(name="get_boxscore")
 async def cmd_get_boxscore(ctx, game_pk: int = None):
+    final = False
     if game_pk is None:
         # Try to get a recent game
         try:
-            games = get_recent_games(TEAM_ID)
+            games = await get_recent_games(team_for_channel(ctx.channel.id))
             if not games:
                 await ctx.send("No recent games found.")
                 return
-            game_pk = games[0]["gamePk"]
+            game_pk = games[0].game_pk
+            final = True  # get_recent_games only returns completed games
         except Exception as e:
             await ctx.send(f"Error: {e}")
             return
     try:
-        boxscore = get_boxscore(game_pk)
+        boxscore = await get_boxscore(game_pk, final=final)
         summary = f"Boxscore for gamePk {game_pk}: keys: {list(boxscore.keys())}"
     except Exception as e:
         summary = f"Error: {e}"
@@ -468,8 +2423,8 @@ async def cmd_get_boxscore(ctx, game_pk: int = None):
 @bot.command(name="aggregate_player_stats")
 async def cmd_aggregate_player_stats(ctx):
     try:
-        games = get_recent_games(TEAM_ID)
-        stats = aggregate_player_stats(games, TEAM_ID)
+        games = await get_recent_games(team_for_channel(ctx.channel.id))
+        stats = await aggregate_player_stats(games, team_for_channel(ctx.channel.id))
         await ctx.send(f"Aggregated stats for {len(stats)} players.")
     except Exception as e:
         await ctx.send(f"Error: {e}")
@@ -477,8 +2432,8 @@ async def cmd_aggregate_player_stats(ctx):
 @bot.command(name="compute_batting_average")
 async def cmd_compute_batting_average(ctx):
     try:
-        games = get_recent_games(TEAM_ID)
-        stats = aggregate_player_stats(games, TEAM_ID)
+        games = await get_recent_games(team_for_channel(ctx.channel.id))
+        stats = await aggregate_player_stats(games, team_for_channel(ctx.channel.id))
         players = compute_batting_average(stats)
         await ctx.send(f"Players with computed avg: {len(players)}")
     except Exception as e:
@@ -487,24 +2442,103 @@ async def cmd_compute_batting_average(ctx):
 @bot.command(name="format_batting_stats")
 async def cmd_format_batting_stats(ctx):
     try:
-        games = get_recent_games(TEAM_ID)
-        stats = aggregate_player_stats(games, TEAM_ID)
+        games = await get_recent_games(team_for_channel(ctx.channel.id))
+        stats = await aggregate_player_stats(games, team_for_channel(ctx.channel.id))
         players = compute_batting_average(stats)
         formatted = format_batting_stats(players, top_n=3)
-        await ctx.send(f"```{formatted}```")
+        await send_table(ctx, None, formatted)
     except Exception as e:
         await ctx.send(f"Error: {e}")
 
+####################################
+# Job Store
+####################################
+job_store_db = None
+
+def get_job_store():
+    """
+    Opens the SQLite job store on first use. It keeps the update each scheduled
+    job produced per run date and channel, and small named state values such as
+    last-run dates and message rotation positions.
+    """
+    global job_store_db
+    with db_open_lock:
+        if job_store_db is None:
+            store_dir = os.path.dirname(JOB_STORE_PATH)
+            if store_dir:
+                os.makedirs(store_dir, exist_ok=True)
+            db = sqlite3.connect(JOB_STORE_PATH, check_same_thread=False)
+            with db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS job_runs ("
+                    "job TEXT NOT NULL, run_date TEXT NOT NULL, channel_id INTEGER NOT NULL, "
+                    "update_json TEXT NOT NULL, sent_at REAL, "
+                    "PRIMARY KEY (job, run_date, channel_id))"
+                )
+                db.execute("CREATE TABLE IF NOT EXISTS job_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            job_store_db = db
+    return job_store_db
+
+def load_job_state(key, default=None):
+    row = get_job_store().execute("SELECT value FROM job_state WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+def save_job_state(key, value):
+    db = get_job_store()
+    with db:
+        db.execute("INSERT OR REPLACE INTO job_state (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+def next_rotation_message(name, messages, **fields):
+    """
+    Formats the next message of a rotating list. The position is kept in the
+    job store, so a restart continues the rotation instead of starting over.
+    """
+    idx = load_job_state(f"rotation:{name}", 0) % len(messages)
+    save_job_state(f"rotation:{name}", (idx + 1) % len(messages))
+    return messages[idx].format(**fields)
+
+def load_job_updates(job_name, run_date):
+    """
+    Returns {channel_id: (update, sent_at)} for one run of a job.
+    """
+    rows = get_job_store().execute(
+        "SELECT channel_id, update_json, sent_at FROM job_runs WHERE job = ? AND run_date = ?",
+        (job_name, run_date),
+    )
+    return {channel_id: (json.loads(update_json), sent_at) for channel_id, update_json, sent_at in rows}
+
+def save_job_update(job_name, run_date, channel_id, update):
+    db = get_job_store()
+    with db:
+        db.execute(
+            "INSERT OR REPLACE INTO job_runs (job, run_date, channel_id, update_json, sent_at) VALUES (?, ?, ?, ?, NULL)",
+            (job_name, run_date, channel_id, json.dumps(update)),
+        )
+        # Keep a month of runs for troubleshooting.
+        cutoff = (datetime.date.fromisoformat(run_date) - datetime.timedelta(days=30)).isoformat()
+        db.execute("DELETE FROM job_runs WHERE run_date < ?", (cutoff,))
+
+def mark_job_update_sent(job_name, run_date, channel_id):
+    db = get_job_store()
+    with db:
+        db.execute(
+            "UPDATE job_runs SET sent_at = ? WHERE job = ? AND run_date = ? AND channel_id = ?",
+            (time.time(), job_name, run_date, channel_id),
+        )
+
 ####################################
 # Scheduled Task: Daily at 9:00 AM Pacific Time
 ####################################
+PACIFIC_TZ = ZoneInfo("America/Los_Angeles")
+DAILY_POST_TIME = datetime.time(hour=9, minute=0, second=0, tzinfo=PACIFIC_TZ)
+
 standings_messages = [
-    "Kick off the weekend with the NL West standings:",
-    "Weekend update! Here’s where the NL West sits heading into Friday:",
-    "Happy Friday! Check out the NL West standings as we roll into the weekend:",
-    "NL West snapshot for your weekend:",
-    "NL West rundown for Friday — see who’s leading as the weekend arrives:",
-    "It’s Friday! Here’s your NL West standings update:"
+    "Kick off the weekend with the {division} standings:",
+    "Weekend update! Here’s where the {division} sits heading into Friday:",
+    "Happy Friday! Check out the {division} standings as we roll into the weekend:",
+    "{division} snapshot for your weekend:",
+    "{division} rundown for Friday — see who’s leading as the weekend arrives:",
+    "It’s Friday! Here’s your {division} standings update:"
 ]
 
 series_messages = [
@@ -518,56 +2552,320 @@ series_messages = [
     "Matchup vs. {opponent} starts today! These hitters have been red-hot in the last 10 games:"
 ]
 
-standings_message_idx = 0
-series_message_idx = 0
+class ScheduledJob:
+    """
+    A post sent to every followed channel at `post_time` (Pacific) on the given
+    weekdays (Monday=0; every day when None). `build(team_id, now)` returns an
+    (intro, table) pair, or None when there is nothing to post. Adding a job,
+    e.g. a weekly recap, only takes a build function and an entry in
+    SCHEDULED_JOBS.
+    """
+    def __init__(self, name, post_time, build, weekdays=None, prewarm_minutes=30):
+        self.name = name
+        self.post_time = post_time
+        self.build = build
+        self.weekdays = weekdays
+        self.prewarm_minutes = prewarm_minutes
+        self.retries = {}  # channel id -> (run date, failures, next attempt)
+        self.posted_on = None  # Day of the last post attempt by this process
 
-@tasks.loop(time=datetime.time(hour=9, minute=0, second=0, tzinfo=ZoneInfo("America/Los_Angeles")))
-async def scheduled_stats():
-    try:
+    def runs_on(self, day):
+        return self.weekdays is None or day.weekday() in self.weekdays
+
+    def due_at(self, day):
+        return datetime.datetime.combine(day, self.post_time)
+
+    def retry_due(self, channel_id, now):
+        retry = self.retries.get(channel_id)
+        return retry is None or retry[0] != now.date() or now >= retry[2]
+
+    def record_failure(self, channel_id, now):
         """
-        Runs every day at 9:00 AM Pacific Time.
-          - On Friday, it posts the current NL West standings.
-          - On other days, if a new series starts today, it posts Dodgers batting stats.
-        This task only runs if at least one Regular season game is scheduled within the next 30 days.
+        Backs off the next attempt for a failing channel. Returns True on the
+        first failure of the day, so the error is only logged once.
         """
-        # Check if there is an upcoming Regular season game for the Dodgers.
-        if not upcoming_regular_season_game_exists(TEAM_ID):
-            await admin_log("No upcoming Regular season game for the Dodgers within the next 30 days. Skipping scheduled task.")
-            return
+        retry = self.retries.get(channel_id)
+        failures = retry[1] + 1 if retry and retry[0] == now.date() else 1
+        delay = min(2 ** (failures - 1), JOB_RETRY_MAX_MINUTES)
+        self.retries[channel_id] = (now.date(), failures, now + datetime.timedelta(minutes=delay))
+        return failures == 1
+
+    def record_success(self, channel_id):
+        self.retries.pop(channel_id, None)
+
+def served_channel_teams():
+    """
+    Returns the followed channels this process posts to. A process running a
+    subset of the shards only serves the channels in its own guilds.
+    """
+    if SHARD_IDS is None:
+        return CHANNEL_TEAMS
+    return {channel_id: team_id for channel_id, team_id in CHANNEL_TEAMS.items() if bot.get_channel(channel_id) is not None}
 
-        channel = bot.get_channel(CHANNEL_ID)
+def last_run_key(job):
+    if SHARD_IDS is None:
+        return f"last_run:{job.name}"
+    return f"last_run:{job.name}:{SHARD_GROUP}"
+
+async def prepare_job(job, now):
+    """
+    Builds and stores today's update for every served channel that doesn't
+    have one yet. Only builds that finished without an error are stored; a
+    failed one is retried with backoff. Returns the number of updates built.
+    """
+    run_date = now.date().isoformat()
+    stored = load_job_updates(job.name, run_date)
+    built = 0
+    for channel_id, team_id in served_channel_teams().items():
+        if channel_id in stored or not job.retry_due(channel_id, now):
+            continue
+        try:
+            update = await job.build(team_id, now)
+        except Exception as e:
+            if job.record_failure(channel_id, now):
+                await admin_log(f":warning: [{job.name}] error preparing channel {channel_id}: {e}; retrying with backoff")
+            continue
+        save_job_update(job.name, run_date, channel_id, update)
+        job.record_success(channel_id)
+        built += 1
+    return built
+
+async def post_job(job, now):
+    """
+    Posts today's update to every channel that hasn't received it yet, building
+    any that weren't prepared ahead of time. The run is recorded once every
+    update went out; until then the channels that failed are retried with backoff.
+    """
+    start = time.perf_counter()
+    run_date = now.date().isoformat()
+    rebuilt = await prepare_job(job, now)
+    served = served_channel_teams()
+    updates = {channel_id: row for channel_id, row in load_job_updates(job.name, run_date).items() if channel_id in served}
+    deliveries = []
+    for channel_id, (update, sent_at) in updates.items():
+        if update is None or sent_at is not None or not job.retry_due(channel_id, now):
+            continue
+        channel = bot.get_channel(channel_id)
         if channel is None:
-            await admin_log(f"Channel with ID {CHANNEL_ID} not found.")
-            return
+            if job.record_failure(channel_id, now):
+                await admin_log(f"Channel with ID {channel_id} not found.")
+            continue
+        deliveries.append((channel_id, channel, update))
 
-        now = datetime.datetime.now(ZoneInfo("America/Los_Angeles"))
-        global standings_message_idx, series_message_idx
-        if now.weekday() == 4:  # Friday (Monday=0, Fri=4)
-            standings_message = get_nlwest_standings()
-            intro = standings_messages[standings_message_idx]
-            standings_message_idx = (standings_message_idx + 1) % len(standings_messages)
-            message = f"{intro}\n```{standings_message}```"
-            await channel.send(message)
-        else:
-            # Only post Dodgers batting stats if a new series has started today.
-            if is_new_series_today(TEAM_ID):
-                stats_message = get_dodgers_batting_stats()
-                opponent = get_today_opponent(TEAM_ID)  # Fetch the opponent
-                intro = series_messages[series_message_idx].format(opponent=opponent)
-                series_message_idx = (series_message_idx + 1) % len(series_messages)
-                message = f"{intro}\n```{stats_message}```"
-                await channel.send(message)
+    # Send to every channel at once; send_message paces them within Discord's limits.
+    async def deliver(channel_id, channel, update):
+        try:
+            await send_table(channel, *update)
+            mark_job_update_sent(job.name, run_date, channel_id)
+            job.record_success(channel_id)
+            return True
+        except Exception as e:
+            if job.record_failure(channel_id, now):
+                await admin_log(f":warning: [{job.name}] error for channel {channel_id}: {e}; retrying with backoff")
+            return False
+
+    with metrics.timer("discord_send_seconds", job=job.name):
+        sent = await asyncio.gather(*(deliver(*delivery) for delivery in deliveries))
+    pending = [
+        channel_id for channel_id, (update, sent_at) in load_job_updates(job.name, run_date).items()
+        if channel_id in served and update is not None and sent_at is None
+    ]
+    if not pending and len(updates) == len(served):
+        save_job_state(last_run_key(job), run_date)
+    if any(sent) or rebuilt:
+        elapsed = time.perf_counter() - start
+        await admin_log(f"[{job.name}] posted {sum(sent)}/{len(deliveries)} updates in {elapsed:.2f}s ({rebuilt} built at post time)")
+
+async def run_job_if_due(job, now):
+    """
+    Prepares a job's updates from `prewarm_minutes` before its post time and
+    posts them once the time has come. A post missed while the bot was down is
+    made on the first check after a restart if it is at most
+    JOB_CATCH_UP_GRACE_MINUTES late, and skipped otherwise.
+    """
+    today = now.date()
+    if not job.runs_on(today) or load_job_state(last_run_key(job)) == today.isoformat():
+        return
+    due = job.due_at(today)
+    if now < due - datetime.timedelta(minutes=job.prewarm_minutes):
+        return
+    if now < due:
+        start = time.perf_counter()
+        built = await prepare_job(job, now)
+        if built:
+            elapsed = time.perf_counter() - start
+            await admin_log(f"[{job.name}] prepared {built}/{len(served_channel_teams())} updates in {elapsed:.2f}s")
+        return
+
+    late = now - due
+    if late > datetime.timedelta(minutes=JOB_CATCH_UP_GRACE_MINUTES):
+        save_job_state(last_run_key(job), today.isoformat())
+        await admin_log(f":warning: [{job.name}] missed the {due:%H:%M} post by {late}; skipping today's run")
+        return
+    if late > datetime.timedelta(minutes=2) and job.posted_on != today:
+        await admin_log(f"[{job.name}] catching up on the {due:%H:%M} post")
+    job.posted_on = today
+    await post_job(job, now)
+
+@tasks.loop(minutes=1)
+async def scheduled_jobs():
+    """
+    Checks every minute which scheduled jobs are due.
+    """
+    now = datetime.datetime.now(PACIFIC_TZ)
+    for job in SCHEDULED_JOBS:
+        try:
+            await run_job_if_due(job, now)
+        except Exception as e:
+            await admin_log(f":warning: [{job.name}] error: {e}")
+
+async def build_daily_update(team_id, now):
+    """
+    Builds the daily update for one team as an (intro, table) pair, or returns None if there is nothing to post.
+      - On Friday, it posts the current standings of the team's division.
+      - On other days, if a new series starts today, it posts the team's batting stats.
+    This only runs if at least one Regular season game is scheduled within the next 30 days.
+    Errors fetching data are raised, so a failed build is retried instead of
+    being stored as "nothing to post" or posting the error text.
+    """
+    # Check if there is an upcoming Regular season game for the team.
+    if not await check_upcoming_regular_season_game(team_id):
+        await admin_log(f"No upcoming Regular season game for team {team_id} within the next 30 days. Skipping scheduled task.")
+        return None
+
+    if now.weekday() == 4:  # Friday (Monday=0, Fri=4)
+        division_id = await get_team_division_id(team_id)
+        standings_message = await cached_division_standings(division_id)
+        division = DIVISION_NAMES.get(division_id, "division")
+        intro = next_rotation_message("standings", standings_messages, division=division)
+        return intro, standings_message
+
+    # Only post batting stats if a new series has started today.
+    if not await check_new_series_today(team_id):
+        print(f"No new series started today for team {team_id}.")
+        return None
+    stats_message = await cached_team_batting_stats(team_id)
+    opponent = await find_today_opponent(team_id)  # Fetch the opponent
+    intro = next_rotation_message("series", series_messages, opponent=opponent)
+    return intro, stats_message
+
+# Jobs run by scheduled_jobs. Each one's updates are stored in the job store, so a
+# restart neither rebuilds nor reposts them.
+SCHEDULED_JOBS = [
+    ScheduledJob("daily_update", DAILY_POST_TIME, build_daily_update),
+]
+
+@scheduled_jobs.before_loop
+async def before_scheduled_jobs():
+    await bot.wait_until_ready()
+
+@scheduled_jobs.error
+async def scheduled_jobs_error(exc, _task):
+    await admin_log(f":warning: [scheduled_jobs] crashed: {exc}")
+
+####################################
+# Historical Store Backfill: Daily at 4:00 AM Pacific Time
+####################################
+@tasks.loop(time=datetime.time(hour=4, minute=0, second=0, tzinfo=PACIFIC_TZ))
+async def history_backfill():
+    """
+    Adds any newly completed games of the current season to the historical store.
+    The first run backfills the whole season; later runs only fetch new games.
+    """
+    season = datetime.date.today().year
+    start = time.perf_counter()
+    try:
+        # Only one process per shared data volume runs the nightly backfill
+        lock = run_exclusively("history_backfill", 3600) if HISTORY_DB_SHARED else contextlib.nullcontext(True)
+        async with lock as owner:
+            if not owner:
+                return
+            stored, failed = await backfill_season(season)
+    except Exception as e:
+        await admin_log(f":warning: [history_backfill] error: {e}")
+        return
+    if stored or failed:
+        elapsed = time.perf_counter() - start
+        await admin_log(f"[history_backfill] stored {stored} games from {season} ({failed} failed) in {elapsed:.1f}s")
+
+@history_backfill.before_loop
+async def before_history_backfill():
+    await bot.wait_until_ready()
+
+####################################
+# Live Game Task (opt-in with LIVE_MODE=1)
+####################################
+live_trackers = {}
+
+@tasks.loop(seconds=LIVE_IDLE_SECONDS)
+async def live_updates():
+    """
+    Follows today's games of every followed team and posts scoring plays and
+    final scores to the channels following either club. The loop interval is
+    adjusted after every pass to suit the most active game: frequent while a
+    game is in progress, slower in the half hour before first pitch or during a
+    delay, and idle until then and once every game is over.
+    """
+    try:
+        index = await get_schedule_index()
+        # Game dates follow the US calendar; the container's clock runs in UTC.
+        today = datetime.datetime.now(PACIFIC_TZ).date()
+        games = {}
+        for team_id in FOLLOWED_TEAM_IDS:
+            for game in index.games_on(team_id, today):
+                games[game.game_pk] = game
+
+        # A game still going when the date changes keeps its tracker until it
+        # goes Final; forget the others once they are off today's schedule.
+        for game_pk, tracker in list(live_trackers.items()):
+            if game_pk in games:
+                continue
+            if tracker.finished or game_pk not in index.games_by_pk:
+                del live_trackers[game_pk]
             else:
-                print("No new series started today.")
+                games[game_pk] = index.games_by_pk[game_pk]
+
+        intervals = []
+        for game_pk, game in games.items():
+            tracker = live_trackers.setdefault(game_pk, LiveGameTracker(game_pk, game.start_time))
+            if tracker.finished:
+                continue
+            # Sleep until shortly before first pitch, waking at least every
+            # LIVE_IDLE_SECONDS in case the schedule changes.
+            wait = tracker.seconds_until_pregame(datetime.datetime.now(datetime.timezone.utc))
+            if wait > 0:
+                intervals.append(min(wait, LIVE_IDLE_SECONDS))
+                continue
+            try:
+                messages = await poll_live_game(tracker)
+            except ApiUnavailableError:
+                # The outage has already been reported once by the circuit breaker.
+                intervals.append(LIVE_DELAY_SECONDS)
+                continue
+            except Exception as e:
+                await admin_log(f":warning: [live_updates] game {game_pk}: {e}")
+                intervals.append(LIVE_DELAY_SECONDS)
+                continue
+            if messages:
+                team_ids = game.team_ids
+                for channel_id, team_id in CHANNEL_TEAMS.items():
+                    channel = bot.get_channel(channel_id)
+                    if team_id in team_ids and channel is not None:
+                        await send_message(channel, "\n".join(messages))
+            if not tracker.finished:
+                intervals.append(tracker.next_poll_seconds())
+
+        live_updates.change_interval(seconds=min(intervals, default=LIVE_IDLE_SECONDS))
     except Exception as e:
-        await admin_log(f":warning: [scheduled_stats] error: {e}")
+        await admin_log(f":warning: [live_updates] error: {e}")
 
-@scheduled_stats.before_loop
-async def before_scheduled_stats():
+@admin_digest.before_loop
+async def before_admin_digest():
     await bot.wait_until_ready()
 
-@scheduled_stats.error
-async def scheduled_stats_error(exc, _task):
-    await admin_log(f":warning: [scheduled_stats] crashed: {exc}")
+@live_updates.before_loop
+async def before_live_updates():
+    await bot.wait_until_ready()
 
-bot.run(DISCORD_TOKEN)
+if __name__ == "__main__":
+    bot.run(DISCORD_TOKEN)